@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+
+def _new_bucket():
+    """Create an empty accumulator for one month."""
+    return {
+        'count': 0,
+        'debits': 0,
+        'credits': 0,
+        'categories': defaultdict(int)
+    }
+
+
+#Aggregate transactions
+def aggregate_transactions(transactions):
+    """Compute overall, per-category, per-month and per-month-per-category totals in one pass.
+
+    Amounts are integer cents, so the sums are exact and partial results
+    can be combined in any order. Returns a dict with:
+        count, debits, credits  - overall totals in cents (debits are positive)
+        categories              - {category: signed amount}
+        months                  - {(year, month): {count, debits, credits, categories}}
+    Categories are the lowercased transaction description.
+    """
+    count = 0
+    debits = 0
+    credits = 0
+    categories = defaultdict(int)
+    months = defaultdict(_new_bucket)
+
+    for t in transactions:
+        amount = t['amount']
+        category = t['description'].lower()
+        date = t['date']
+        month = months[(date.year, date.month)]
+
+        count += 1
+        month['count'] += 1
+        if amount < 0:
+            debits -= amount
+            month['debits'] -= amount
+        elif amount > 0:
+            credits += amount
+            month['credits'] += amount
+        categories[category] += amount
+        month['categories'][category] += amount
+
+    return {
+        'count': count,
+        'debits': debits,
+        'credits': credits,
+        'categories': dict(categories),
+        'months': {key: dict(bucket, categories=dict(bucket['categories']))
+                   for key, bucket in months.items()}
+    }
@@ -0,0 +1,62 @@
+#Benchmark: single-pass aggregation vs the old per-category/per-month rescans
+#Run from the project root: python -m benchmarks.bench_aggregation [rows] [categories]
+import sys
+import time
+
+from aggregation import aggregate_transactions
+from benchmarks.synthetic_ledger import generate_transactions
+
+
+def legacy_aggregate(transactions):
+    """The totals the old analyze_finances computed, using its rescanning loops."""
+    total_debits = abs(sum(t['amount'] for t in transactions if t['amount'] < 0))
+    total_credits = sum(t['amount'] for t in transactions if t['amount'] > 0)
+    categories = {}
+    for category in set(t['description'].lower() for t in transactions):
+        category_transactions = [t for t in transactions if t['description'].lower() == category]
+        categories[category] = sum(t['amount'] for t in category_transactions)
+    months = {}
+    for year, month in set((t['date'].year, t['date'].month) for t in transactions):
+        month_transactions = [t for t in transactions
+                              if t['date'].year == year and t['date'].month == month]
+        month_categories = {}
+        for category in set(t['description'].lower() for t in month_transactions):
+            cat_transactions = [t for t in month_transactions if t['description'].lower() == category]
+            month_categories[category] = sum(t['amount'] for t in cat_transactions)
+        months[(year, month)] = {
+            'count': len(month_transactions),
+            'debits': abs(sum(t['amount'] for t in month_transactions if t['amount'] < 0)),
+            'credits': sum(t['amount'] for t in month_transactions if t['amount'] > 0),
+            'categories': month_categories
+        }
+    return total_debits, total_credits, categories, months
+
+
+def time_it(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    categories = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    transactions = list(generate_transactions(rows, categories))
+
+    legacy_time, legacy = time_it(legacy_aggregate, transactions)
+    new_time, summary = time_it(aggregate_transactions, transactions)
+
+    # Make sure both approaches agree before reporting the speedup
+    assert abs(legacy[0] - summary['debits']) < 0.01
+    assert abs(legacy[1] - summary['credits']) < 0.01
+    assert set(legacy[2]) == set(summary['categories'])
+    assert set(legacy[3]) == set(summary['months'])
+
+    print(f"Rows: {rows}  Categories: {categories}  Months: {len(summary['months'])}")
+    print(f"Legacy rescans:     {legacy_time:.3f}s")
+    print(f"Single-pass engine: {new_time:.3f}s")
+    print(f"Speedup:            {legacy_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#Benchmark: per-transaction overhead of add_transaction with logging off, synchronous and queued,
+#at DEBUG and at INFO (where the guarded debug calls are skipped entirely)
+#Run from the project root: python -m benchmarks.bench_logging [rows]
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import logger_config
+from financial_utils import add_transaction
+from running_totals import RunningTotals
+
+
+def run(rows, mode, log_dir):
+    """Add rows transactions and return the elapsed seconds."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        level = 'INFO' if mode.endswith('-info') else 'DEBUG'
+        logger = logger_config.setup_logger(async_logging=mode.startswith('async'), level=level, log_dir=log_dir)
+        logger.disabled = (mode == 'off')
+        transactions = []
+        totals = RunningTotals()
+        start = time.perf_counter()
+        for i in range(rows):
+            add_transaction(transactions, {
+                'date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                'amount': -12.5 if i % 3 else 250.0,
+                'type': 'debit' if i % 3 else 'credit',
+                'description': f"Category {i % 40}"
+            }, totals=totals)
+        elapsed = time.perf_counter() - start
+        # Include the time to drain the queue so async mode is not flattered
+        logger_config.setup_logger(async_logging=False, log_dir=log_dir)
+        drained = time.perf_counter() - start
+    return elapsed, drained
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = {mode: run(rows, mode, log_dir) for mode in ('off', 'sync', 'async', 'sync-info', 'async-info')}
+    baseline = results['off'][0]
+    print(f"Rows: {rows}")
+    for mode, (elapsed, drained) in results.items():
+        print(f"Logging {mode:<10} {elapsed / rows * 1e6:8.1f} us/transaction "
+              f"(+{(elapsed - baseline) / rows * 1e6:6.1f} us)  incl. drain {drained / rows * 1e6:8.1f} us")
+    logger_config.setup_logger()
+
+
+if __name__ == "__main__":
+    main()
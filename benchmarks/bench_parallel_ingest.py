@@ -0,0 +1,38 @@
+#Benchmark: parallel CSV ingestion scaling with the number of workers
+#Run from the project root: python -m benchmarks.bench_parallel_ingest [rows] [max_workers]
+import os
+import sys
+import tempfile
+import time
+
+import parallel_ingest
+from benchmarks.synthetic_ledger import write_ledger
+from parallel_ingest import load_transactions_parallel
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    # Split even modest benchmark files so every worker gets a piece
+    parallel_ingest.MIN_PIECE_BYTES = 64 * 1024
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'ledger.csv')
+        write_ledger(filename, rows, categories=200)
+        print(f"Rows: {rows}  File size: {os.path.getsize(filename) / 1024 / 1024:.1f} MiB")
+
+        baseline = None
+        workers = 1
+        while workers <= max_workers:
+            start = time.perf_counter()
+            store = load_transactions_parallel(filename, workers=workers, columnar=True)
+            elapsed = time.perf_counter() - start
+            assert len(store) == rows
+            baseline = baseline or elapsed
+            print(f"Workers: {workers:<3} {elapsed:.3f}s  {rows / elapsed:,.0f} rows/s  speedup {baseline / elapsed:.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
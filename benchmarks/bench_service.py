@@ -0,0 +1,231 @@
+#Load generator for the JSON service (service.py)
+#Run from the project root. Without --url it seeds synthetic ledgers in a
+#temporary directory and starts `python main.py serve` on them itself:
+#   python -m benchmarks.bench_service --clients 50 --ledgers 4 --rows 100000 --duration 10
+#   python -m benchmarks.bench_service --url http://127.0.0.1:8765 --mix add=1,analyze=1
+#Prints requests/sec and latency percentiles for each kind of request.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.synthetic_ledger import write_ledger
+
+# Relative weight of each kind of request
+DEFAULT_MIX = 'add=50,list=20,analyze=15,range=5,update=5,delete=2,report=3'
+
+CATEGORIES = 50
+
+
+def parse_mix(text):
+    """Turn 'add=50,list=20' into {'add': 50, 'list': 20}."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown request kind: {name} (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _payload(rng):
+    cents = rng.randint(100, 50000)
+    return {
+        'date': f"{rng.randrange(2020, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'amount': f"{cents // 100}.{cents % 100:02d}",
+        'type': 'debit' if rng.random() < 0.7 else 'credit',
+        'description': f"Category {rng.randrange(CATEGORIES)}"
+    }
+
+
+#Requests (method, path, body) for each kind
+def _add(rng, ledger, rows):
+    return 'POST', f"/ledgers/{ledger}/transactions", _payload(rng)
+
+
+def _list(rng, ledger, rows):
+    return 'GET', f"/ledgers/{ledger}/transactions?category=Category%20{rng.randrange(CATEGORIES)}&limit=20", None
+
+
+def _analyze(rng, ledger, rows):
+    return 'GET', f"/ledgers/{ledger}/analysis", None
+
+
+def _range(rng, ledger, rows):
+    year = rng.randrange(2020, 2024)
+    return 'GET', f"/ledgers/{ledger}/analysis?from={year}-01-01&to={year}-06-30", None
+
+
+def _update(rng, ledger, rows):
+    return 'PUT', f"/ledgers/{ledger}/transactions/{rng.randint(1, max(rows, 1))}", _payload(rng)
+
+
+def _delete(rng, ledger, rows):
+    return 'DELETE', f"/ledgers/{ledger}/transactions/{rng.randint(1, max(rows, 1))}", None
+
+
+def _report(rng, ledger, rows):
+    return 'GET', f"/ledgers/{ledger}/report?format=json&rows=0", None
+
+
+OPERATIONS = {
+    'add': _add,
+    'list': _list,
+    'analyze': _analyze,
+    'range': _range,
+    'update': _update,
+    'delete': _delete,
+    'report': _report
+}
+
+
+#HTTP client
+async def request(reader, writer, host, method, path, body=None):
+    """Send one request on a keep-alive connection and return (status, body bytes)."""
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(number, host, port, ledgers, rows, mix, deadline, results):
+    """Send requests on one connection until the deadline, recording (kind, seconds, status)."""
+    rng = random.Random(number)
+    kinds, weights = list(mix), list(mix.values())
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            method, path, body = OPERATIONS[kind](rng, rng.choice(ledgers), rows)
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, method, path, body)
+            results.append((kind, time.perf_counter() - start, status))
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, ledgers, rows, clients, duration, mix):
+    results = []
+    # Load every ledger before timing starts
+    reader, writer = await asyncio.open_connection(host, port)
+    for ledger in ledgers:
+        await request(reader, writer, host, 'POST', f"/ledgers/{ledger}/load")
+    writer.close()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(i, host, port, ledgers, rows, mix, deadline, results) for i in range(clients)))
+    return results, time.perf_counter() - start
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(results, elapsed):
+    """Return {kind: {...}} with request counts, rates and latency percentiles in milliseconds."""
+    by_kind = {}
+    for kind, seconds, status in results:
+        by_kind.setdefault(kind, []).append((seconds, status))
+    by_kind['all'] = [(seconds, status) for _, seconds, status in results]
+    summary = {}
+    for kind, samples in by_kind.items():
+        latencies = sorted(seconds * 1000 for seconds, _ in samples)
+        summary[kind] = {
+            'requests': len(samples),
+            'per_second': len(samples) / elapsed,
+            # A 404 is an update or delete of an ID that is already gone
+            'missing': sum(1 for _, status in samples if status == 404),
+            'errors': sum(1 for _, status in samples if status >= 400 and status != 404),
+            'p50_ms': _percentile(latencies, 0.50),
+            'p95_ms': _percentile(latencies, 0.95),
+            'p99_ms': _percentile(latencies, 0.99),
+            'max_ms': latencies[-1]
+        }
+    return summary
+
+
+def start_server(directory, port, ledgers, rows):
+    """Seed synthetic ledgers in directory and start the service on them as a subprocess."""
+    for number, ledger in enumerate(ledgers):
+        write_ledger(os.path.join(directory, f"{ledger}.csv"), rows, categories=CATEGORIES, seed=number)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(root, 'main.py'), 'serve', '--data-dir', directory, '--port', str(port)],
+        cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=dict(os.environ, FINANCE_LOG_LEVEL='WARNING')
+    )
+
+    async def wait_until_listening():
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"The service did not start listening on port {port}")
+    asyncio.run(wait_until_listening())
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate concurrent load against the ledger JSON service.")
+    parser.add_argument('--url', help="service to load (default: start one on seeded synthetic ledgers)")
+    parser.add_argument('--port', type=int, default=8799, help="port for the service started without --url")
+    parser.add_argument('--clients', type=int, default=50, help="concurrent keep-alive connections")
+    parser.add_argument('--ledgers', type=int, default=4, help="number of ledgers to spread requests over")
+    parser.add_argument('--rows', type=int, default=10000, help="rows per seeded ledger")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to run")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"request kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    ledgers = [f"bench_{i}" for i in range(args.ledgers)]
+    process = None
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            host, port = '127.0.0.1', args.port
+            process = start_server(directory, port, ledgers, args.rows)
+        try:
+            results, elapsed = asyncio.run(run_load(host, port, ledgers, args.rows, args.clients, args.duration, mix))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    summary = summarize(results, elapsed)
+    print(f"{args.clients} clients, {args.ledgers} ledgers, {elapsed:.1f}s")
+    print(f"{'Request':<9} {'Count':>8} {'Req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7}")
+    for kind, stats in sorted(summary.items(), key=lambda item: item[0] == 'all'):
+        print(f"{kind:<9} {stats['requests']:>8} {stats['per_second']:>9.1f} {stats['p50_ms']:>8.2f} "
+              f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['errors']:>7}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'clients': args.clients, 'ledgers': args.ledgers, 'duration': elapsed, 'results': summary},
+                      file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#Benchmark: import time of the app's modules and wall time of a short batch command
+#Run from the project root:
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --max-ms 60   (exit status 1 if importing financial_utils gets slower)
+#Each measurement runs in a fresh interpreter under `python -X importtime`, from
+#an empty directory that is checked afterwards: importing must not create files.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_ledger import write_ledger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('logger_config', 'financial_utils', 'journal', 'cli')
+
+# Modules listed as the slowest imports under each target
+TOP_IMPORTS = 5
+
+
+def import_times(module, directory):
+    """Import module in a fresh interpreter and return {imported module: (self us, cumulative us)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=directory, env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def created_files(directory):
+    """Return whatever a run left behind in directory, then empty it."""
+    names = sorted(os.listdir(directory))
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    return names
+
+
+def batch_time(directory, ledger):
+    """Return the wall time in seconds of `python main.py load --quiet` on ledger."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--file', ledger, 'load', '--quiet'],
+                   cwd=directory, env=dict(os.environ, FINANCE_LOG_LEVEL='WARNING'),
+                   capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and startup time of the finance app.")
+    parser.add_argument('--repeat', type=int, default=7, help="runs per measurement; the median is reported")
+    parser.add_argument('--rows', type=int, default=100, help="rows in the ledger used for the batch command")
+    parser.add_argument('--max-ms', type=float, help="fail if importing financial_utils takes longer than this")
+    parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    side_effects = {}
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as data_directory:
+        for module in MODULES:
+            runs = []
+            for _ in range(args.repeat):
+                runs.append(import_times(module, directory))
+                leftovers = created_files(directory)
+                if leftovers:
+                    side_effects[module] = leftovers
+            cumulative = statistics.median(times[module][1] for times in runs)
+            slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:TOP_IMPORTS]
+            results[module] = {'import_ms': cumulative / 1000,
+                               'slowest': {name: self_us / 1000 for name, (self_us, _) in slowest}}
+            print(f"import {module:<16} {cumulative / 1000:7.1f} ms   slowest: "
+                  + ", ".join(f"{name} {self_us / 1000:.1f}" for name, (self_us, _) in slowest))
+
+        ledger = os.path.join(data_directory, 'ledger.csv')
+        write_ledger(ledger, args.rows)
+        batch = statistics.median(batch_time(data_directory, ledger) for _ in range(args.repeat))
+        results['batch_load'] = {'wall_ms': batch * 1000}
+        print(f"main.py load --quiet ({args.rows} rows) {batch * 1000:7.1f} ms wall time")
+
+    for module, leftovers in side_effects.items():
+        print(f"SIDE EFFECT: importing {module} created {', '.join(leftovers)}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results,
+                       'side_effects': side_effects}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    too_slow = args.max_ms is not None and results['financial_utils']['import_ms'] > args.max_ms
+    if too_slow:
+        print(f"Importing financial_utils took {results['financial_utils']['import_ms']:.1f} ms "
+              f"(limit {args.max_ms:.1f} ms)")
+    if side_effects or too_slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#Benchmark: memory used by a list of dicts vs a columnar TransactionStore
+#Run from the project root: python -m benchmarks.bench_store_memory [rows] [categories]
+import sys
+import tracemalloc
+
+from benchmarks.synthetic_ledger import generate_transactions
+from transaction_store import TransactionStore
+
+
+def measure(build):
+    """Return (result, bytes allocated) for calling build()."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    categories = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    transactions, dict_bytes = measure(lambda: list(generate_transactions(rows, categories)))
+    store, store_bytes = measure(lambda: TransactionStore(transactions))
+
+    assert len(store) == len(transactions)
+    assert store[rows // 2] == transactions[rows // 2]
+
+    print(f"Rows: {rows}  Categories: {categories}")
+    print(f"List of dicts:    {dict_bytes / 1024 / 1024:8.1f} MiB ({dict_bytes / rows:.0f} bytes/row)")
+    print(f"TransactionStore: {store_bytes / 1024 / 1024:8.1f} MiB ({store_bytes / rows:.0f} bytes/row)")
+    print(f"Reduction:        {dict_bytes / store_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
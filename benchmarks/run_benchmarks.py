@@ -0,0 +1,128 @@
+#Benchmark harness: times load, add, analyze, save and report on synthetic ledgers
+#Run from the project root:
+#   python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 -o results.json
+#   python -m benchmarks.run_benchmarks --compare results.json   (exit status 1 on regression)
+#Sizes up to 10000000 work, but use --columnar above a few million rows.
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic_ledger import generate_transactions, write_ledger
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+OPERATIONS = ('load', 'add', 'analyze', 'save', 'report')
+
+# Transactions appended one by one in the "add" step
+ADD_COUNT = 1000
+
+# A run is flagged when an operation takes this many times longer than before
+DEFAULT_THRESHOLD = 1.2
+
+
+def time_it(func, *args, **kwargs):
+    """Return (seconds, result) for one call with the app's console output discarded."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+def run_size(rows, directory, categories=50, columnar=False):
+    """Time every operation on a ledger of rows transactions and return {operation: seconds}."""
+    from financial_utils import add_transaction, analyze_finances, load_transactions, write_transactions_csv
+    from money import format_cents
+    from report_writer import write_report
+    from running_totals import RunningTotals
+
+    filename = os.path.join(directory, f"ledger_{rows}.csv")
+    write_ledger(filename, rows, categories=categories)
+    results = {}
+
+    results['load'], transactions = time_it(load_transactions, filename, columnar=columnar, quiet=True)
+    assert len(transactions) == rows, f"loaded {len(transactions)} of {rows} rows"
+
+    totals = RunningTotals(transactions)
+    new_rows = [
+        {'date': t['date'].strftime('%Y-%m-%d'), 'amount': format_cents(t['amount']), 'type': t['type'],
+         'description': t['description']}
+        for t in generate_transactions(ADD_COUNT, categories, seed=rows)
+    ]
+
+    def add_all():
+        for row in new_rows:
+            add_transaction(transactions, row, totals=totals)
+
+    results['add'], _ = time_it(add_all)
+    results['analyze'], _ = time_it(analyze_finances, transactions)
+    results['save'], _ = time_it(write_transactions_csv, transactions, filename)
+    results['report'], _ = time_it(write_report, transactions, os.path.join(directory, 'report.txt'))
+    os.remove(filename)
+    return results
+
+
+def compare(results, previous, threshold=DEFAULT_THRESHOLD):
+    """Return a list of (rows, operation, before, after) for operations slower than threshold times before."""
+    regressions = []
+    for rows, timings in results.items():
+        for operation, seconds in timings.items():
+            before = previous.get(rows, {}).get(operation)
+            if before and seconds > before * threshold:
+                regressions.append((rows, operation, before, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the finance app on synthetic ledgers.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="ledger sizes in rows")
+    parser.add_argument('--categories', type=int, default=50, help="number of distinct descriptions")
+    parser.add_argument('--columnar', action='store_true', help="load into a TransactionStore")
+    parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='JSON', help="flag regressions against an earlier results file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"slowdown ratio counted as a regression (default {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    # Per-transaction INFO logging would dominate the add timings
+    from logger_config import logger
+    logger.setLevel(logging.WARNING)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            results[str(rows)] = timings = run_size(rows, directory, args.categories, args.columnar)
+            print(f"Rows: {rows:<9} " + "  ".join(f"{op} {timings[op]:.3f}s" for op in OPERATIONS))
+
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'categories': args.categories,
+        'columnar': args.columnar,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(record, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)['results']
+        regressions = compare(results, previous, args.threshold)
+        for rows, operation, before, after in regressions:
+            print(f"REGRESSION rows={rows} {operation}: {before:.3f}s -> {after:.3f}s ({after / before:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#Deterministic synthetic ledger generator for benchmarks
+#Run from the project root:
+#   python -m benchmarks.synthetic_ledger ledger.csv --rows 1000000 --categories 500
+import argparse
+import random
+from datetime import datetime, timedelta
+
+
+def generate_transactions(rows, categories=50, start='2020-01-01', days=4 * 365, debit_ratio=0.7,
+                          max_amount=500.0, seed=42):
+    """Yield rows synthetic transaction dicts.
+
+    The same arguments always produce the same ledger. Dates are spread
+    uniformly over `days` days from `start`, descriptions are drawn from
+    `categories` distinct values and `debit_ratio` of the rows are debits.
+    Amounts are integer cents, negative for debits, as load_transactions
+    stores them. IDs run 1..rows.
+    """
+    rng = random.Random(seed)
+    first_day = datetime.strptime(start, '%Y-%m-%d')
+    names = [f"Category {i}" for i in range(categories)]
+    for i in range(rows):
+        amount = rng.randint(100, round(max_amount * 100))
+        transaction_type = 'debit' if rng.random() < debit_ratio else 'credit'
+        yield {
+            'id': i + 1,
+            'date': first_day + timedelta(days=rng.randrange(days)),
+            'amount': -amount if transaction_type == 'debit' else amount,
+            'type': transaction_type,
+            'description': names[rng.randrange(categories)]
+        }
+
+
+def write_ledger(filename, rows, **options):
+    """Stream a synthetic ledger to a CSV file in the Date,Amount,Type,Description layout."""
+    from financial_utils import write_transactions
+    with open(filename, 'w', newline='') as file:
+        return write_transactions(generate_transactions(rows, **options), file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic ledger CSV.")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=50, help="number of distinct descriptions")
+    parser.add_argument('--start', default='2020-01-01', help="first date (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=4 * 365, help="date span in days")
+    parser.add_argument('--debit-ratio', type=float, default=0.7, help="fraction of rows that are debits")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    count = write_ledger(args.output, args.rows, categories=args.categories, start=args.start,
+                         days=args.days, debit_ratio=args.debit_ratio, seed=args.seed)
+    print(f"Wrote {count} transactions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
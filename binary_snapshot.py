@@ -0,0 +1,215 @@
+import mmap
+import os
+import struct
+from datetime import datetime
+
+import financial_utils
+import result_cache
+from financial_utils import iter_transactions, write_transactions_csv
+from transaction_store import TransactionStore
+
+# File layout (all little-endian):
+#   header   - magic, version, CRC32 of the source CSV (0 if none), record count
+#              and the offsets of both string tables
+#   records  - one fixed-width record per transaction
+#   types    - string table of transaction types
+#   strings  - string table of descriptions
+# A string table is a uint32 count followed by (uint32 length, UTF-8 bytes) pairs.
+MAGIC = b'FINSNAP\x00'
+VERSION = 2
+HEADER = struct.Struct('<8sHHIQQQ')  # magic, version, flags, source CRC, count, types offset, strings offset
+RECORD = struct.Struct('<qqiIB3x')    # ID, cents, date ordinal, description code, type code, padding
+COUNT = struct.Struct('<I')
+
+# numpy.dtype equivalent of RECORD, for as_numpy()
+RECORD_DTYPE = [('id', '<i8'), ('cents', '<i8'), ('date', '<i4'), ('category', '<u4'), ('type', 'u1'),
+                ('pad', 'V3')]
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a readable binary snapshot."""
+
+
+def _write_table(file, strings):
+    file.write(COUNT.pack(len(strings)))
+    for text in strings:
+        data = text.encode('utf-8')
+        file.write(COUNT.pack(len(data)))
+        file.write(data)
+
+
+def _read_table(buffer, offset):
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    strings = []
+    for _ in range(count):
+        (length,) = COUNT.unpack_from(buffer, offset)
+        offset += COUNT.size
+        strings.append(bytes(buffer[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return strings
+
+
+#Write snapshot
+def write_snapshot(transactions, filename, source_crc=0):
+    """Write transactions to a binary snapshot and return how many records were written.
+
+    transactions can be any iterable of transaction dicts, so a CSV can be
+    converted while streaming. Records are written first and the string
+    tables are appended once every description has been seen; the header is
+    filled in last and the file is renamed into place atomically. source_crc
+    is the CRC32 of the CSV the snapshot was made from, so a reader can tell
+    whether it is still a faithful copy. A row that does not fit the record
+    layout (an ID or amount beyond 64 bits) raises SnapshotError, and the
+    partly written file is removed.
+    """
+    type_codes = {}
+    category_codes = {}
+    count = 0
+    temp_filename = filename + '.tmp'
+    try:
+        with open(temp_filename, 'wb') as file:
+            file.write(b'\x00' * HEADER.size)
+            for t in transactions:
+                type_code = type_codes.setdefault(t['type'], len(type_codes))
+                if type_code > 255:
+                    raise SnapshotError("Too many distinct transaction types")
+                category_code = category_codes.setdefault(t['description'], len(category_codes))
+                try:
+                    file.write(RECORD.pack(t['id'], t['amount'], t['date'].toordinal(), category_code, type_code))
+                except struct.error as e:
+                    raise SnapshotError(f"Transaction {t['id']} does not fit in a snapshot record: {str(e)}")
+                count += 1
+            types_offset = file.tell()
+            _write_table(file, list(type_codes))
+            strings_offset = file.tell()
+            _write_table(file, list(category_codes))
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, 0, source_crc, count, types_offset, strings_offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+    return count
+
+
+#Read snapshot
+class Snapshot:
+    """Read-only, memory-mapped view of a binary snapshot.
+
+    Opening only reads the header and the string tables; records are paged
+    in by the operating system as they are accessed. Rows come back as the
+    usual transaction dicts with the IDs they were saved with.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{filename} is empty")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{filename} is too short to be a snapshot")
+        magic, version, _, source_crc, count, types_offset, strings_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f"{filename} is not a transaction snapshot")
+        if version != VERSION:
+            self.close()
+            raise SnapshotError(f"{filename} has unsupported snapshot version {version}")
+        self.count = count
+        self.source_crc = source_crc
+        self.type_table = _read_table(self._map, types_offset)
+        self.category_table = _read_table(self._map, strings_offset)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        """Return the raw (ID, cents, date ordinal, description code, type code) for a row."""
+        if index < 0:
+            index += self.count
+        if index < 0 or index >= self.count:
+            raise IndexError("snapshot index out of range")
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def iter_records(self):
+        """Yield every raw record tuple in file order."""
+        records = memoryview(self._map)[HEADER.size:HEADER.size + self.count * RECORD.size]
+        try:
+            yield from RECORD.iter_unpack(records)
+        finally:
+            records.release()
+
+    def __getitem__(self, index):
+        return self._transaction(self.record(index))
+
+    def __iter__(self):
+        for record in self.iter_records():
+            yield self._transaction(record)
+
+    def _transaction(self, record):
+        row_id, cents, date, category, type_code = record
+        return {
+            'id': row_id,
+            'date': datetime.fromordinal(date),
+            'amount': cents,
+            'type': self.type_table[type_code],
+            'description': self.category_table[category]
+        }
+
+    def as_numpy(self):
+        """Return the records as a numpy.memmap structured array (requires NumPy)."""
+        import numpy as np
+        return np.memmap(self.filename, dtype=np.dtype(RECORD_DTYPE), mode='r',
+                         offset=HEADER.size, shape=(self.count,))
+
+
+def open_snapshot(filename):
+    """Open a binary snapshot for lazy, memory-mapped reading."""
+    return Snapshot(filename)
+
+
+def load_snapshot(filename):
+    """Load a binary snapshot into a TransactionStore; new IDs continue after the largest one."""
+    store = TransactionStore()
+    with open_snapshot(filename) as snapshot:
+        for row_id, cents, date, category, type_code in snapshot.iter_records():
+            store.append_row(row_id, date, cents, snapshot.type_table[type_code], snapshot.category_table[category])
+    financial_utils.transaction_counter = max(financial_utils.transaction_counter, max(store.ids, default=0))
+    result_cache.bump_version()
+    return store
+
+
+#Convert to and from CSV
+def csv_to_snapshot(csv_filename, snapshot_filename):
+    """Convert a Date,Amount,Type,Description[,ID] CSV into a binary snapshot.
+
+    The snapshot records the CSV's CRC32, so a TransactionJournal for the
+    CSV loads from it while the CSV is unchanged.
+    """
+    from journal import file_crc
+    financial_utils.transaction_counter = 0
+    return write_snapshot(iter_transactions(csv_filename), snapshot_filename, file_crc(csv_filename))
+
+
+def snapshot_to_csv(snapshot_filename, csv_filename):
+    """Convert a binary snapshot back into the CSV layout save_transactions writes."""
+    with open_snapshot(snapshot_filename) as snapshot:
+        return write_transactions_csv(snapshot, csv_filename)
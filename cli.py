@@ -0,0 +1,228 @@
+#cli.py - non-interactive batch mode for main.py
+#
+#   python main.py load [SOURCE] [--quiet] [--offset N] [--limit N]
+#                                              print the transactions in SOURCE
+#   python main.py import SOURCE               append SOURCE's rows to the ledger
+#   python main.py analyze [SOURCE]            print the financial analysis
+#   python main.py report [SOURCE] [-o OUTPUT] write the summary report (TXT, CSV or JSON)
+#   python main.py save [--output OUTPUT]      write the ledger (CSV + journal) as one CSV
+#   python main.py query [--from DATE] [--to DATE] [--category NAME] [--offset N] [--limit N]
+#                                              print the transactions in a date range and/or category
+#   python main.py serve [--data-dir DIR] [--port N]
+#                                              serve the ledgers in DIR as a local JSON API (see service.py)
+#
+# SOURCE and OUTPUT may be '-' for stdin/stdout. Without SOURCE the ledger
+# given by --file is used, including any unsaved journal entries. A --file
+# ending in .db, .sqlite or .sqlite3 is a SQLite ledger: analyze, report and
+# query then run their aggregation and filtering as SQL queries.
+import argparse
+import sys
+
+DEFAULT_LEDGER = 'financial_transactions.csv'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description="Smart Personal Finance Analyzer. Run without arguments for the interactive menu."
+    )
+    parser.add_argument('-f', '--file', default=DEFAULT_LEDGER,
+                        help=f"ledger CSV or SQLite file to work on (default: {DEFAULT_LEDGER})")
+    parser.add_argument('--profile', action='store_true',
+                        help="record wall time, rows/sec, peak memory and call counts per operation "
+                             "and print them at exit")
+    parser.add_argument('--profile-format', choices=['table', 'json'], default='table',
+                        help="layout of the --profile summary (default: table)")
+    parser.add_argument('--profile-output', help="write the --profile summary to this file instead of stderr")
+    parser.add_argument('--cprofile', metavar='FILE', help="dump cProfile stats for this run to FILE")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help="print the transactions in a CSV file")
+    load.add_argument('source', nargs='?', help="CSV file to read, or - for stdin (default: the ledger)")
+    load.add_argument('-q', '--quiet', action='store_true', help="only print the number of transactions")
+    _add_paging(load)
+
+    import_ = commands.add_parser('import', help="append transactions from a CSV file or stdin to the ledger")
+    import_.add_argument('source', help="CSV file in Date,Amount,Type,Description layout, or - for stdin")
+
+    analyze = commands.add_parser('analyze', help="print the financial analysis")
+    analyze.add_argument('source', nargs='?', help="CSV file to analyze, or - for stdin (default: the ledger)")
+
+    report = commands.add_parser('report', help="write the summary report")
+    report.add_argument('source', nargs='?', help="CSV file to report on, or - for stdin (default: the ledger)")
+    report.add_argument('-o', '--output', default='-', help="report file, or - for stdout (default: -)")
+    report.add_argument('--format', choices=['txt', 'csv', 'json'],
+                        help="report format (default: from the output file extension, else txt)")
+    report.add_argument('--no-rows', action='store_true', help="leave out the transaction listing")
+
+    save = commands.add_parser('save', help="write the ledger, with its journal applied, as a single CSV")
+    save.add_argument('-o', '--output', help="file to write, or - for stdout (default: compact into the ledger)")
+
+    query = commands.add_parser('query', help="print the ledger's transactions in a date range and/or category")
+    query.add_argument('--from', dest='start', help="first date, YYYY-MM-DD")
+    query.add_argument('--to', dest='end', help="last date, YYYY-MM-DD")
+    query.add_argument('--category', help="description to match (case-insensitive)")
+    _add_paging(query)
+
+    serve = commands.add_parser('serve', help="serve a directory of ledgers as a local JSON API")
+    serve.add_argument('--data-dir', default='ledgers', help="directory holding the ledgers (default: ledgers)")
+    serve.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    serve.add_argument('--workers', type=int, help="processes for reports and analyses (default: up to 4)")
+    serve.add_argument('--flush-interval', type=float, default=1.0,
+                       help="seconds between writes of unsaved changes (default: 1.0)")
+    serve.add_argument('--sqlite', action='store_true', help="create new ledgers as SQLite files instead of CSV")
+    return parser
+
+
+def _add_paging(parser):
+    parser.add_argument('--offset', type=int, default=0, help="skip this many transactions")
+    parser.add_argument('--limit', type=int, help="print at most this many transactions")
+
+
+def _read(source, ledger):
+    """Return the transactions for a command's SOURCE argument."""
+    if source == '-':
+        from financial_utils import read_transactions
+        return list(read_transactions(sys.stdin))
+    if source is None or source == ledger:
+        from journal import open_journal
+        return open_journal(ledger).load()
+    from financial_utils import iter_transactions
+    return list(iter_transactions(source))
+
+
+#Commands
+def command_load(args):
+    transactions = _read(args.source, args.file)
+    if args.quiet:
+        print(len(transactions))
+        return 0
+    from financial_utils import view_transactions
+    view_transactions(transactions, args.limit, args.offset)
+    print(f"Total transactions: {len(transactions)}")
+    return 0
+
+
+def command_import(args):
+    from financial_utils import import_transactions, iter_transactions, read_transactions, save_transactions
+    from journal import open_journal
+    journal = open_journal(args.file)
+    transactions = journal.load()
+    # Imported rows get new IDs after the ledger's own, whatever IDs the source carries
+    rejected = []
+    if args.source == '-':
+        new_transactions = read_transactions(sys.stdin, keep_ids=False, rejected=rejected)
+    else:
+        new_transactions = iter_transactions(args.source, keep_ids=False, rejected=rejected)
+    count = import_transactions(transactions, new_transactions, journal)
+    save_transactions(transactions, args.file, journal)
+    journal.wait()
+    print(f"Imported {count} transactions into {args.file}")
+    if rejected:
+        # The good rows are kept, but a scheduled import must notice the dropped ones
+        print(f"Skipped {len(rejected)} rows that could not be parsed (see the log for details)", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _sqlite_ledger(args):
+    """Return a SQLiteLedger when the command works on a SQLite --file, else None."""
+    from financial_utils import is_sqlite_file
+    if args.source is None and is_sqlite_file(args.file):
+        from sqlite_ledger import SQLiteLedger
+        return SQLiteLedger(args.file)
+    return None
+
+
+def command_analyze(args):
+    from financial_utils import analyze_finances
+    ledger = _sqlite_ledger(args)
+    if ledger is not None:
+        # Totals come from GROUP BY queries; rows are streamed for the listing
+        analyze_finances(ledger, ledger)
+        return 0
+    analyze_finances(_read(args.source, args.file))
+    return 0
+
+
+def command_report(args):
+    from report_writer import write_report
+    ledger = _sqlite_ledger(args)
+    output = sys.stdout if args.output == '-' else args.output
+    if ledger is not None:
+        write_report(ledger, output, args.format, ledger.summary(), include_rows=not args.no_rows)
+        return 0
+    transactions = _read(args.source, args.file)
+    write_report(transactions, output, args.format, include_rows=not args.no_rows)
+    return 0
+
+
+def command_save(args):
+    from journal import open_journal
+    journal = open_journal(args.file)
+    transactions = journal.load()
+    if args.output is None:
+        journal.compact(transactions)
+        print(f"Saved {len(transactions)} transactions to {args.file}")
+    elif args.output == '-':
+        from financial_utils import write_transactions
+        write_transactions(transactions, sys.stdout)
+    else:
+        from financial_utils import write_transactions_csv
+        count = write_transactions_csv(transactions, args.output)
+        print(f"Saved {count} transactions to {args.output}")
+    return 0
+
+
+def command_query(args):
+    from financial_utils import is_sqlite_file, select_transactions, view_transactions
+    if is_sqlite_file(args.file):
+        from sqlite_ledger import SQLiteLedger
+        with SQLiteLedger(args.file) as ledger:
+            if args.category:
+                transactions = ledger.transactions_for_category(args.category, args.start, args.end)
+            else:
+                transactions = ledger.transactions_between(args.start or '0001-01-01', args.end or '9999-12-31')
+    else:
+        transactions = select_transactions(_read(None, args.file), args.start, args.end, args.category)
+    view_transactions(transactions, args.limit, args.offset)
+    print(f"Matching transactions: {len(transactions)}")
+    return 0
+
+
+def command_serve(args):
+    import service
+    return service.run(args.host, args.port, args.data_dir, args.workers or service.DEFAULT_WORKERS,
+                       args.flush_interval, args.sqlite)
+
+
+COMMANDS = {
+    'load': command_load,
+    'import': command_import,
+    'analyze': command_analyze,
+    'report': command_report,
+    'save': command_save,
+    'query': command_query,
+    'serve': command_serve,
+}
+
+
+def run_batch(argv):
+    """Run one batch command and return the process exit code."""
+    args = build_parser().parse_args(argv)
+    if args.profile or args.cprofile:
+        import instrumentation
+        if args.profile:
+            instrumentation.enable(args.profile_format, args.profile_output)
+        if args.cprofile:
+            instrumentation.enable_cprofile(args.cprofile)
+    try:
+        return COMMANDS[args.command](args)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}", file=sys.stderr)
+        return 1
+    except (ValueError, OSError) as e:
+        # e.g. a bad --from date or an unknown report format
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
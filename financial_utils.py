@@ -1,6 +1,18 @@
 import csv
+import logging
+import os
 from datetime import datetime
+import result_cache
 from logger_config import logger
+from money import format_cents, parse_cents, to_cents
+from instrumentation import instrumented
+from transaction_store import TransactionStore
+
+# Ledger files with these extensions are kept in SQLite (see sqlite_ledger.py) instead of CSV
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# CSV ledgers this large are parsed by a pool of worker processes (see parallel_ingest.py)
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
 
 # Global counter for transaction IDs
 transaction_counter = 0
@@ -11,44 +23,126 @@ def get_next_transaction_id():
     transaction_counter += 1
     return transaction_counter
 
-#Load Transactions  
-def load_transactions(filename='financial_transactions.csv'):
-    transactions = []
+def is_sqlite_file(filename):
+    """Return True if filename names a SQLite ledger (.db, .sqlite or .sqlite3) rather than a CSV."""
+    return isinstance(filename, str) and filename.lower().endswith(SQLITE_EXTENSIONS)
+
+def parse_date(date_str):
+    """Parse a YYYY-MM-DD date, skipping strptime for the common fixed format."""
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+    return datetime.strptime(date_str, '%Y-%m-%d')
+
+def parse_row(row, keep_id=True):
+    """Convert a Date,Amount,Type,Description[,ID] CSV row into a transaction dict.
+
+    A row with an ID keeps it, and later IDs continue after it. Rows without
+    one, or every row when keep_id is False, get the next free ID.
+    """
     global transaction_counter
+    date = parse_date(row[0])
+    amount = parse_cents(row[1])
+    transaction_type = row[2].lower()
+    if transaction_type == 'debit':
+        amount = -amount
+    description = row[3]
+    if keep_id and len(row) > 4 and row[4]:
+        transaction_id = int(row[4])
+        transaction_counter = max(transaction_counter, transaction_id)
+    else:
+        transaction_id = get_next_transaction_id()
+    return {
+        'id': transaction_id,
+        'date': date,
+        'amount': amount,
+        'type': transaction_type,
+        'description': description
+    }
+
+#Stream Transactions
+def iter_transactions(filename='financial_transactions.csv', keep_ids=True, rejected=None):
+    """Yield transactions from a CSV file one at a time without holding the file in memory.
+
+    Rows that fail to parse are logged and skipped, and appended to the
+    rejected list when one is given. A missing file raises
+    FileNotFoundError when iteration starts. With keep_ids=False the IDs in
+    the file are ignored and every row gets a new one, as for an import.
+    """
+    with open(filename, 'r', newline='') as file:
+        yield from read_transactions(file, keep_ids, rejected)
+
+def read_transactions(file, keep_ids=True, rejected=None):
+    """Yield transactions from an open CSV file object, such as sys.stdin."""
+    csv_reader = csv.reader(file)
+    next(csv_reader, None)  # Skip the header row
+    for row in csv_reader:
+        try:
+            yield parse_row(row, keep_ids)
+        except (ValueError, IndexError) as e:
+            logger.warning("Error parsing row: %s, Error: %s", row, e)
+            if rejected is not None:
+                rejected.append(row)
+            continue
+
+def read_csv_ledger(filename, columnar=False):
+    """Return every transaction in a CSV file as a list (or TransactionStore).
+
+    Files of PARALLEL_MIN_BYTES or more are split across worker processes
+    when there is more than one CPU; the rows and IDs are the same either
+    way. A missing file raises FileNotFoundError.
+    """
+    if os.path.getsize(filename) >= PARALLEL_MIN_BYTES and (os.cpu_count() or 1) > 1:
+        from parallel_ingest import read_transactions_parallel
+        return read_transactions_parallel(filename, columnar=columnar)
+    transactions = TransactionStore() if columnar else []
+    transactions.extend(iter_transactions(filename))
+    return transactions
+
+def iter_transaction_chunks(filename='financial_transactions.csv', chunk_size=10000):
+    """Yield lists of at most chunk_size transactions from a CSV file."""
+    chunk = []
+    for transaction in iter_transactions(filename):
+        chunk.append(transaction)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+#Load Transactions  
+@instrumented('load_transactions', rows='result')
+def load_transactions(filename='financial_transactions.csv', columnar=False, quiet=False, journal=None):
+    """Load transactions from a CSV file.
+
+    With columnar=True the rows are kept in a TransactionStore instead of a
+    list of dicts, which uses far less memory on large files. With quiet=True
+    the loaded rows are not printed. With a journal the CSV snapshot is
+    loaded and the journal's changes are replayed on top of it. A filename
+    ending in .db, .sqlite or .sqlite3 is read from a SQLite ledger.
+    """
+    transactions = TransactionStore() if columnar else []
     try:
         logger.info(f"Attempting to load transactions from {filename}")
-        with open(filename, 'r') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header row
-            for row in csv_reader:
-                try:
-                    date = datetime.strptime(row[0], '%Y-%m-%d')
-                    amount = float(row[1])
-                    transaction_type = row[2].lower()
-                    if transaction_type == 'debit':
-                        amount = -amount
-                    transaction = {
-                        'id': get_next_transaction_id(),
-                        'date': date,
-                        'amount': amount,
-                        'type': transaction_type,
-                        'description': row[3]
-                    }
-                    transactions.append(transaction)
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Error parsing row: {row}, Error: {str(e)}")
-                    continue
+        if journal is not None:
+            transactions = journal.load(columnar)
+        elif is_sqlite_file(filename):
+            from sqlite_ledger import iter_sqlite_transactions
+            transactions.extend(iter_sqlite_transactions(filename))
+        else:
+            transactions = read_csv_ledger(filename, columnar)
+        result_cache.bump_version()
         
         # Display loaded transactions
         if transactions:
             logger.info(f"Successfully loaded {len(transactions)} transactions")
-            print("\nLoaded Transactions:")
-            print("-" * 100)
-            print(f"{'ID':<6} {'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
-            print("-" * 100)
-            for t in transactions:
-                print(f"{t['id']:<6} {t['date'].strftime('%Y-%m-%d'):<12} ${t['amount']:<9.2f} {t['type']:<8} {t['description']}")
-            print("-" * 100)
+            if not quiet:
+                print("\nLoaded Transactions:")
+                print("-" * 100)
+                print(f"{'ID':<6} {'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
+                print("-" * 100)
+                for t in transactions:
+                    print(f"{t['id']:<6} {t['date'].strftime('%Y-%m-%d'):<12} ${format_cents(t['amount']):<9} {t['type']:<8} {t['description']}")
+                print("-" * 100)
             print(f"Total transactions loaded: {len(transactions)}")
         else:
             logger.info("No transactions found in the file")
@@ -58,42 +152,69 @@ def load_transactions(filename='financial_transactions.csv'):
     except FileNotFoundError:
         logger.warning(f"Transaction file not found: {filename}")
         print("\nNo transaction file found. Starting with an empty list.")
-        return []
+        return TransactionStore() if columnar else []
     except Exception as e:
         logger.error(f"Unexpected error loading transactions: {str(e)}", exc_info=True)
         print(f"\nError loading transactions: {str(e)}")
-        return []
+        return TransactionStore() if columnar else []
 
 #Add Transaction
-def add_transaction(transactions, transaction):
+@instrumented('add_transaction', rows=None)
+def add_transaction(transactions, transaction, journal=None, totals=None, transaction_index=None):
     try:
-        logger.debug(f"Processing transaction: {transaction}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Processing transaction: %s", transaction)
         
         # Convert date string to datetime
         try:
-            date = datetime.strptime(transaction['date'], '%Y-%m-%d')
-            logger.debug(f"Date parsed successfully: {date}")
+            date = parse_date(transaction['date'])
+            if debug:
+                logger.debug("Date parsed successfully: %s", date)
         except ValueError as e:
             logger.error(f"Date parsing error: {str(e)}")
             print(f"Date parsing error: {str(e)}")
             print(f"Attempted to parse: {transaction['date']}")
             print(f"Expected format: 2024-03-20")
             return transactions
+
+        # Convert the dollar amount (text or number) to integer cents
+        try:
+            amount = to_cents(transaction['amount'])
+        except ValueError as e:
+            logger.error(f"Amount parsing error: {str(e)}")
+            print(f"Amount parsing error: {str(e)}")
+            return transactions
         
         # Add ID to transaction
         transaction['id'] = get_next_transaction_id()
         transaction['date'] = date
-        logger.debug(f"Transaction after date conversion: {transaction}")
+        transaction['amount'] = amount
+        if debug:
+            logger.debug("Transaction after date conversion: %s", transaction)
         
         # Add transaction to list
         transactions.append(transaction)
-        logger.info(f"Transaction added successfully. New total: {len(transactions)}")
+        result_cache.bump_version()
+        if journal is not None:
+            journal.record_add(transaction)
+        if totals is not None:
+            totals.add(transaction)
+        if transaction_index is not None:
+            transaction_index.add(transaction, len(transactions) - 1)
+        logger.info("Transaction added successfully. New total: %d", len(transactions))
         
         # Print summary
-        print(f"\nTransaction added: ID {transaction['id']} - {date.strftime('%Y-%m-%d')} - ${transaction['amount']:.2f} - {transaction['description']}")
+        print(f"\nTransaction added: ID {transaction['id']} - {date.strftime('%Y-%m-%d')} - ${format_cents(transaction['amount'])} - {transaction['description']}")
         print(f"Total transactions: {len(transactions)}")
-        print(f"Total spent: ${sum(t['amount'] for t in transactions if t['amount'] < 0):.2f}")
-        print(f"Total earned: ${sum(t['amount'] for t in transactions if t['amount'] > 0):.2f}")
+        if totals is not None:
+            spent = -totals.debits
+            earned = totals.credits
+        else:
+            spent = sum(t['amount'] for t in transactions if t['amount'] < 0)
+            earned = sum(t['amount'] for t in transactions if t['amount'] > 0)
+        print(f"Total spent: ${format_cents(spent)}")
+        print(f"Total earned: ${format_cents(earned)}")
         print("\nNote: Changes are not saved to file until you choose option 7 (Save Transactions)")
         
         return transactions
@@ -102,49 +223,188 @@ def add_transaction(transactions, transaction):
         print(f"Unexpected error: {str(e)}")
         return transactions
 
+#Import transactions
+@instrumented('import_transactions', rows='count')
+def import_transactions(transactions, new_transactions, journal=None, totals=None, transaction_index=None):
+    """Append already-parsed transactions in bulk, e.g. from read_transactions().
+
+    Unlike add_transaction nothing is printed per row, so large imports only
+    cost one pass over the new rows. Returns the number imported.
+    """
+    count = 0
+    for transaction in new_transactions:
+        transactions.append(transaction)
+        if journal is not None:
+            journal.record_add(transaction)
+        if totals is not None:
+            totals.add(transaction)
+        if transaction_index is not None:
+            transaction_index.add(transaction, len(transactions) - 1)
+        count += 1
+    result_cache.bump_version()
+    logger.info("Imported %d transactions. New total: %d", count, len(transactions))
+    return count
+
 #View transactions
 
-def view_transactions(transactions):
-    """Display transactions in a table."""
+# Rows shown per page in the interactive listings
+PAGE_SIZE = 20
+
+def select_transactions(transactions, start=None, end=None, category=None, transaction_index=None):
+    """Return the transactions in a date range and/or category.
+
+    start and end are inclusive datetimes or YYYY-MM-DD strings; either may
+    be left out. category matches the description case-insensitively.
+    Without any filter transactions itself is returned, so nothing is
+    copied. Uses the transaction_index when given, otherwise one scan.
+    """
+    if start is None and end is None and category is None:
+        return transactions
+    low = parse_date(start) if isinstance(start, str) else start
+    high = parse_date(end) if isinstance(end, str) else end
+    if category is None:
+        return result_cache.transactions_between(transactions, low or datetime.min, high or datetime.max, transaction_index)
+    if transaction_index is not None:
+        rows = transaction_index.transactions_for_category(category)
+    else:
+        category = category.lower()
+        rows = [t for t in transactions if t['description'].lower() == category]
+    if low is None and high is None:
+        return rows
+    return [t for t in rows if (low is None or t['date'] >= low) and (high is None or t['date'] <= high)]
+
+def view_transactions(transactions, page_size=None, offset=0):
+    """Display transactions in a table, or only page_size rows from offset.
+
+    Only the rows on the page are formatted, so showing a page of a large
+    ledger costs the same as showing a page of a small one.
+    """
     if not transactions:
         print("\nNo transactions loaded. Please select option 1 to load transactions first.")
         return transactions
-        
+
+    total = len(transactions)
+    offset = min(max(offset, 0), total)
+    stop = total if page_size is None else min(offset + page_size, total)
     print("\nTransaction List:")
     print("-" * 80)
-    print(f"{'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
+    print(f"{'ID':<8} {'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
     print("-" * 80)
-    
-    for t in transactions:
-        print(f"{t['date'].strftime('%Y-%m-%d'):<12} ${t['amount']:<9.2f} {t['type']:<8} {t['description']}")
-    
+    for position in range(offset, stop):
+        t = transactions[position]
+        print(f"{t.get('id', ''):<8} {t['date'].strftime('%Y-%m-%d'):<12} ${format_cents(t['amount']):<9} {t.get('type', 'unknown'):<8} {t['description']}")
     print("-" * 80)
+    if page_size is not None and stop > offset:
+        print(f"Showing {offset + 1}-{stop} of {total} (page {offset // page_size + 1} of {(total + page_size - 1) // page_size})")
     return transactions
 
+def browse_transactions(transactions, transaction_index=None, page_size=PAGE_SIZE, action=None):
+    """Page through transactions interactively, with date and category filters.
+
+    With an action (e.g. 'update') the user can type a transaction ID at
+    the prompt and that ID is returned. Returns None when the user quits.
+    """
+    if not transactions:
+        print("\nNo transactions loaded. Please select option 1 to load transactions first.")
+        return None
+
+    rows = transactions
+    offset = 0
+    controls = "[Enter] next page, [p] previous, [f] filter, [c] clear filter, [q] "
+    controls += f"cancel, or the ID of the transaction to {action}" if action else "back to menu"
+    while True:
+        if rows:
+            view_transactions(rows, page_size, offset)
+        else:
+            print("\nNo transactions match the filter.")
+        choice = input(f"{controls}: ").strip().lower()
+        if choice in ('', 'n'):
+            if offset + page_size < len(rows):
+                offset += page_size
+            elif not action:
+                return None
+        elif choice == 'p':
+            offset = max(0, offset - page_size)
+        elif choice == 'f':
+            start = input("From date (YYYY-MM-DD, blank for no limit): ").strip() or None
+            end = input("To date (YYYY-MM-DD, blank for no limit): ").strip() or None
+            category = input("Category (blank for all): ").strip() or None
+            try:
+                rows = select_transactions(transactions, start, end, category, transaction_index)
+                offset = 0
+            except ValueError as e:
+                print(f"Invalid filter: {str(e)}")
+        elif choice == 'c':
+            rows = transactions
+            offset = 0
+        elif choice == 'q':
+            return None
+        elif action and choice.isdigit():
+            return int(choice)
+        else:
+            print("Invalid choice. Please try again.")
+
+def find_transaction(transactions, transaction_id, transaction_index=None):
+    """Return the position of the transaction with transaction_id, or None.
+
+    The transaction_index's ID -> position map makes this O(1); without it
+    the ledger is scanned.
+    """
+    if transaction_index is not None:
+        return transaction_index.position(transactions, transaction_id)
+    for position, t in enumerate(transactions):
+        if t.get('id') == transaction_id:
+            return position
+    return None
+
+def replace_transaction(transactions, position, changes, journal=None, totals=None, transaction_index=None):
+    """Replace the transaction at position with changes, keeping its ID, and return the new row.
+
+    changes holds the new date, amount, type and description. The journal,
+    running totals and index are kept in step, as in update_transaction.
+    """
+    old_transaction = transactions[position]
+    transactions[position] = {'id': old_transaction.get('id'), **changes}
+    result_cache.bump_version()
+    if journal is not None:
+        journal.record_update(transactions[position])
+    if totals is not None:
+        totals.update(old_transaction, transactions[position])
+    if transaction_index is not None:
+        transaction_index.update(old_transaction, transactions[position])
+    return transactions[position]
+
+def remove_transaction(transactions, position, journal=None, totals=None, transaction_index=None):
+    """Remove and return the transaction at position, keeping the journal, totals and index in step."""
+    deleted_transaction = transactions.pop(position)
+    result_cache.bump_version()
+    if journal is not None:
+        journal.record_delete(deleted_transaction.get('id'))
+    if totals is not None:
+        totals.remove(deleted_transaction)
+    if transaction_index is not None:
+        transaction_index.remove(deleted_transaction)
+    return deleted_transaction
+
+def _choose_transaction(transactions, action, transaction_index):
+    """Let the user pick a transaction by ID and return its position, or None."""
+    transaction_id = browse_transactions(transactions, transaction_index, action=action)
+    if transaction_id is None:
+        return None
+    position = find_transaction(transactions, transaction_id, transaction_index)
+    if position is None:
+        print(f"No transaction with ID {transaction_id}. Please try again.")
+    return position
+
 #update transactions
-def update_transaction(transactions):
-    """Update an existing transaction in the list."""
+def update_transaction(transactions, journal=None, totals=None, transaction_index=None):
+    """Update an existing transaction, chosen by its ID."""
     if not transactions:
         print("\nNo transactions to update. Please add some transactions first.")
         return transactions
-        
-    # Show list with indexes
-    print("\nCurrent Transactions:")
-    print("-" * 80)
-    print(f"{'Index':<8} {'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
-    print("-" * 80)
-    for i, t in enumerate(transactions):
-        print(f"{i:<8} {t['date'].strftime('%Y-%m-%d'):<12} ${t['amount']:<9.2f} {t['type']:<8} {t['description']}")
-    print("-" * 80)
-    
-    # Get and validate index
-    try:
-        index = int(input("\nEnter the index of the transaction to update: "))
-        if index < 0 or index >= len(transactions):
-            print("Invalid index. Please try again.")
-            return transactions
-    except ValueError:
-        print("Please enter a valid number.")
+
+    index = _choose_transaction(transactions, 'update', transaction_index)
+    if index is None:
         return transactions
     
     # Get new transaction details
@@ -152,20 +412,20 @@ def update_transaction(transactions):
         date_str = input("Enter new date (YYYY-MM-DD): ")
         date = datetime.strptime(date_str, '%Y-%m-%d')
         
-        amount = float(input("Enter new amount: "))
+        amount = parse_cents(input("Enter new amount: "))
         transaction_type = input("Enter transaction type (credit/debit): ").lower()
         if transaction_type == 'debit':
             amount = -amount
             
         description = input("Enter new description: ")
         
-        # Update the transaction
-        transactions[index] = {
+        # Update the transaction, keeping its ID
+        replace_transaction(transactions, index, {
             'date': date,
             'amount': amount,
             'type': transaction_type,
             'description': description
-        }
+        }, journal, totals, transaction_index)
         
         print("\nTransaction updated successfully!")
         print("Note: Changes are not saved to file until you choose option 7 (Save Transactions)")
@@ -176,57 +436,40 @@ def update_transaction(transactions):
         return transactions
 
 #delete transactions
-def delete_transaction(transactions):
-    """Delete a transaction from the list."""
+def delete_transaction(transactions, journal=None, totals=None, transaction_index=None):
+    """Delete a transaction, chosen by its ID."""
     if not transactions:
         print("\nNo transactions to delete. Please add some transactions first.")
         return transactions
-        
-    # Show list with indexes
-    print("\nCurrent Transactions:")
-    print("-" * 80)
-    print(f"{'Index':<8} {'Date':<12} {'Amount':<10} {'Type':<8} {'Description'}")
-    print("-" * 80)
-    
-    for i, t in enumerate(transactions):
-        try:
-            # Get transaction type, defaulting to 'unknown' if not present
-            transaction_type = t.get('type', 'unknown')
-            print(f"{i:<8} {t['date'].strftime('%Y-%m-%d'):<12} ${t['amount']:<9.2f} {transaction_type:<8} {t['description']}")
-        except KeyError as e:
-            print(f"Error displaying transaction {i}: Missing field {e}")
-            continue
-    
-    print("-" * 80)
-    
-    # Get and validate index
-    try:
-        index = int(input("\nEnter the index of the transaction to delete: "))
-        if index < 0 or index >= len(transactions):
-            print("Invalid index. Please try again.")
-            return transactions
-            
-        # Delete the transaction
-        deleted_transaction = transactions.pop(index)
-        print(f"\nTransaction deleted successfully!")
-        print("Note: Changes are not saved to file until you choose option 7 (Save Transactions)")
-        return transactions
-        
-    except ValueError:
-        print("Please enter a valid number.")
+
+    index = _choose_transaction(transactions, 'delete', transaction_index)
+    if index is None:
         return transactions
 
+    # Delete the transaction
+    remove_transaction(transactions, index, journal, totals, transaction_index)
+    print(f"\nTransaction deleted successfully!")
+    print("Note: Changes are not saved to file until you choose option 7 (Save Transactions)")
+    return transactions
+
 #analyze finances
-def analyze_finances(transactions):
-    """Analyze finances with detailed breakdowns and percentages."""
+@instrumented('analyze_finances')
+def analyze_finances(transactions, totals=None):
+    """Analyze finances with detailed breakdowns and percentages.
+
+    When running totals are given they are used as-is instead of
+    recomputing every figure from the transactions. The summary and the
+    sorted listing are cached until the ledger next changes.
+    """
     if not transactions:
         print("\nNo transactions to analyze. Please add some transactions first.")
         return transactions
 
     try:
-        # Calculate totals
-        total_debits = abs(sum(t['amount'] for t in transactions if t['amount'] < 0))
-        total_credits = sum(t['amount'] for t in transactions if t['amount'] > 0)
+        # Use the running totals, or calculate every total in a single pass (vectorized for large ledgers)
+        summary = result_cache.ledger_summary(transactions, totals)
+        total_debits = summary['debits']
+        total_credits = summary['credits']
         total_amount = total_debits + total_credits
 
         print("\nFINANCIAL ANALYSIS")
@@ -239,12 +482,12 @@ def analyze_finances(transactions):
         print("-" * 100)
         
         # Sort transactions by ID, handling potential missing IDs
-        sorted_transactions = sorted(transactions, key=lambda x: x.get('id', 0))
+        sorted_transactions = result_cache.sorted_by_id(transactions)
         
         for t in sorted_transactions:
             try:
                 percentage = (abs(t['amount']) / total_amount * 100) if total_amount > 0 else 0
-                print(f"{t.get('id', 'N/A'):<6} {t['date'].strftime('%Y-%m-%d'):<12} ${t['amount']:<9.2f} {t['type']:<8} {t['description'][:30]:<30} {percentage:<9.1f}%")
+                print(f"{t.get('id', 'N/A'):<6} {t['date'].strftime('%Y-%m-%d'):<12} ${format_cents(t['amount']):<9} {t['type']:<8} {t['description'][:30]:<30} {percentage:<9.1f}%")
             except (KeyError, AttributeError) as e:
                 logger.error(f"Error processing transaction: {t}, Error: {str(e)}")
                 continue
@@ -257,20 +500,10 @@ def analyze_finances(transactions):
         print(f"{'Category':<30} {'Amount':<12} {'Type':<8} {'% of Total':<10}")
         print("-" * 100)
         
-        # Get unique categories
-        categories = set(t['description'].lower() for t in transactions)
-        
-        for category in sorted(categories):
-            try:
-                category_transactions = [t for t in transactions if t['description'].lower() == category]
-                category_amount = sum(t['amount'] for t in category_transactions)
-                category_percentage = (abs(category_amount) / total_amount * 100) if total_amount > 0 else 0
-                transaction_type = 'debit' if category_amount < 0 else 'credit'
-                
-                print(f"{category[:30]:<30} ${abs(category_amount):<11.2f} {transaction_type:<8} {category_percentage:<9.1f}%")
-            except Exception as e:
-                logger.error(f"Error processing category {category}: {str(e)}")
-                continue
+        for category, category_amount in sorted(summary['categories'].items()):
+            category_percentage = (abs(category_amount) / total_amount * 100) if total_amount > 0 else 0
+            transaction_type = 'debit' if category_amount < 0 else 'credit'
+            print(f"{category[:30]:<30} ${format_cents(abs(category_amount)):<11} {transaction_type:<8} {category_percentage:<9.1f}%")
         
         print("-" * 100)
         
@@ -278,52 +511,38 @@ def analyze_finances(transactions):
         print("\nMONTHLY ANALYSIS")
         print("-" * 100)
         
-        # Get all unique months from transactions
-        months = set((t['date'].year, t['date'].month) for t in transactions)
-        months = sorted(months, reverse=True)  # Most recent months first
-        
-        for year, month in months:
-            month_transactions = [t for t in transactions 
-                                if t['date'].year == year and t['date'].month == month]
-            
-            month_debits = abs(sum(t['amount'] for t in month_transactions if t['amount'] < 0))
-            month_credits = sum(t['amount'] for t in month_transactions if t['amount'] > 0)
+        # Most recent months first
+        for (year, month), month_summary in sorted(summary['months'].items(), reverse=True):
+            month_debits = month_summary['debits']
+            month_credits = month_summary['credits']
             month_total = month_debits + month_credits
             
             print(f"\n{datetime(year, month, 1).strftime('%B %Y')}")
             print("-" * 80)
-            print(f"Total Transactions: {len(month_transactions)}")
-            print(f"Total Debits:  ${month_debits:.2f} ({(month_debits/month_total*100):.1f}% of month)")
-            print(f"Total Credits: ${month_credits:.2f} ({(month_credits/month_total*100):.1f}% of month)")
-            print(f"Net Balance:   ${(month_credits - month_debits):.2f}")
+            print(f"Total Transactions: {month_summary['count']}")
+            print(f"Total Debits:  ${format_cents(month_debits)} ({(month_debits/month_total*100):.1f}% of month)")
+            print(f"Total Credits: ${format_cents(month_credits)} ({(month_credits/month_total*100):.1f}% of month)")
+            print(f"Net Balance:   ${format_cents(month_credits - month_debits)}")
             
             # Monthly Category Breakdown
             print("\nCategory Breakdown:")
             print(f"{'Category':<30} {'Amount':<12} {'Type':<8} {'% of Month':<10}")
             print("-" * 80)
             
-            month_categories = set(t['description'].lower() for t in month_transactions)
-            for category in sorted(month_categories):
-                try:
-                    cat_transactions = [t for t in month_transactions if t['description'].lower() == category]
-                    cat_amount = sum(t['amount'] for t in cat_transactions)
-                    cat_percentage = (abs(cat_amount) / month_total * 100) if month_total > 0 else 0
-                    trans_type = 'debit' if cat_amount < 0 else 'credit'
-                    
-                    print(f"{category[:30]:<30} ${abs(cat_amount):<11.2f} {trans_type:<8} {cat_percentage:<9.1f}%")
-                except Exception as e:
-                    logger.error(f"Error processing monthly category {category}: {str(e)}")
-                    continue
+            for category, cat_amount in sorted(month_summary['categories'].items()):
+                cat_percentage = (abs(cat_amount) / month_total * 100) if month_total > 0 else 0
+                trans_type = 'debit' if cat_amount < 0 else 'credit'
+                print(f"{category[:30]:<30} ${format_cents(abs(cat_amount)):<11} {trans_type:<8} {cat_percentage:<9.1f}%")
         
         print("-" * 100)
         
         # Summary Statistics
         print("\nOVERALL SUMMARY STATISTICS")
         print("-" * 100)
-        print(f"Total Transactions: {len(transactions)}")
-        print(f"Total Debits:  ${total_debits:.2f} ({(total_debits/total_amount*100):.1f}% of total)")
-        print(f"Total Credits: ${total_credits:.2f} ({(total_credits/total_amount*100):.1f}% of total)")
-        print(f"Net Balance:   ${(total_credits - total_debits):.2f}")
+        print(f"Total Transactions: {summary['count']}")
+        print(f"Total Debits:  ${format_cents(total_debits)} ({(total_debits/total_amount*100):.1f}% of total)")
+        print(f"Total Credits: ${format_cents(total_credits)} ({(total_credits/total_amount*100):.1f}% of total)")
+        print(f"Net Balance:   ${format_cents(total_credits - total_debits)}")
         
         print("\n" + "=" * 100)
         return transactions
@@ -333,38 +552,100 @@ def analyze_finances(transactions):
         return transactions
 
 #save transactions
-def save_transactions(transactions, filename='financial_transactions.csv'):
-    """Save transactions to a CSV file."""
+@instrumented('write_transactions_csv', rows='count')
+def write_transactions_csv(transactions, filename, before_replace=None):
+    """Write transactions to a CSV file atomically and return how many rows were written.
+
+    Rows go to a temporary file in the same directory which is fsynced and
+    then renamed over filename, so a crash mid-write never leaves a
+    truncated ledger behind. before_replace, if given, is called with the
+    temporary file's name just before the rename.
+    """
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w', newline='') as file:
+        count = write_transactions(transactions, file)
+        file.flush()
+        os.fsync(file.fileno())
+    if before_replace is not None:
+        before_replace(temp_filename)
+    os.replace(temp_filename, filename)
+    return count
+
+def write_transactions(transactions, file):
+    """Write transactions in CSV layout to an open file object and return the row count.
+
+    The ID column comes last, so the file still reads as Date,Amount,Type,Description.
+    """
+    count = 0
+    writer = csv.writer(file)
+    writer.writerow(['Date', 'Amount', 'Type', 'Description', 'ID'])
+    for t in transactions:
+        count += 1
+        amount = format_cents(abs(t['amount']))
+        trans_type = 'debit' if t['amount'] < 0 else 'credit'
+        writer.writerow([
+            t['date'].strftime('%Y-%m-%d'),
+            amount,
+            trans_type,
+            t['description'],
+            t.get('id', '')
+        ])
+    return count
+
+@instrumented('save_transactions')
+def save_transactions(transactions, filename='financial_transactions.csv', journal=None):
+    """Save transactions to a CSV file.
+
+    transactions can be any iterable, including iter_transactions() over
+    another file, so large ledgers can be rewritten without loading them.
+    With a loaded journal only the changes recorded since the last save are
+    appended to it and the CSV itself is left for compaction. A filename
+    ending in .db, .sqlite or .sqlite3 is written as a SQLite ledger in a
+    single transaction.
+    """
     try:
-        logger.info(f"Attempting to save {len(transactions)} transactions to {filename}")
-        with open(filename, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['Date', 'Amount', 'Type', 'Description'])
-            for t in transactions:
-                amount = abs(t['amount'])
-                trans_type = 'debit' if t['amount'] < 0 else 'credit'
-                writer.writerow([
-                    t['date'].strftime('%Y-%m-%d'),
-                    amount,
-                    trans_type,
-                    t['description']
-                ])
-        logger.info("Transactions saved successfully")
+        if journal is not None and journal.loaded:
+            written = journal.flush()
+            logger.info(f"Saved {written} journal entries")
+            journal.compact_if_needed(transactions)
+            print("\nTransactions saved successfully!")
+            return
+        logger.info(f"Attempting to save transactions to {filename}")
+        if is_sqlite_file(filename):
+            from sqlite_ledger import write_transactions_sqlite
+            count = write_transactions_sqlite(transactions, filename)
+        else:
+            count = write_transactions_csv(transactions, filename)
+        logger.info(f"Saved {count} transactions successfully")
         print("\nTransactions saved successfully!")
     except Exception as e:
         logger.error(f"Error saving transactions: {str(e)}", exc_info=True)
         print(f"\nError saving transactions: {str(e)}")
 
 #generate report
-def generate_report(transactions):
-    # TODO: Create a .txt or .csv report with summaries
-    for t in transactions:
-        print(f"{t['date'].strftime('%Y-%m-%d')} - ${t['amount']:<9.2f} {t['type']:<8} {t['description']}")
-    # TODO: Include total spent, earned, by category/month
-    print(f"Total spent: ${sum(t['amount'] for t in transactions if t['amount'] < 0):.2f}")
-    print(f"Total earned: ${sum(t['amount'] for t in transactions if t['amount'] > 0):.2f}")
-    print(f"Total transactions: {len(transactions)}")
-    print(f"Total spent by category: {sum(t['amount'] for t in transactions if t['amount'] < 0 and t['type'] == 'debit'):.2f}")
-    print(f"Total earned by category: {sum(t['amount'] for t in transactions if t['amount'] > 0 and t['type'] == 'credit'):.2f}")
-    print(f"Total spent by month: {sum(t['amount'] for t in transactions if t['amount'] < 0 and t['date'].month == datetime.now().month):.2f}")
-    pass
+@instrumented('generate_report')
+def generate_report(transactions, totals=None, filename='report.txt', fmt=None):
+    """Write a TXT, CSV or JSON report with totals by category and month.
+
+    The format follows fmt or the file extension. Figures come from the
+    running totals when given, otherwise from one aggregation pass, and are
+    cached until the ledger next changes.
+    """
+    if not transactions:
+        print("\nNo transactions to report on. Please add some transactions first.")
+        return transactions
+
+    try:
+        from report_writer import write_report
+        logger.info(f"Writing report to {filename}")
+        summary = write_report(transactions, filename, fmt, result_cache.ledger_summary(transactions, totals))
+        print(f"\nTotal transactions: {summary['count']}")
+        print(f"Total spent: ${format_cents(summary['debits'])}")
+        print(f"Total earned: ${format_cents(summary['credits'])}")
+        print(f"Net balance: ${format_cents(summary['credits'] - summary['debits'])}")
+        print(f"\nReport saved to {filename}")
+        return transactions
+    except Exception as e:
+        logger.error(f"Error generating report: {str(e)}", exc_info=True)
+        print(f"\nError generating report: {str(e)}")
+        return transactions
@@ -0,0 +1,157 @@
+import atexit
+import functools
+import os
+import sys
+import time
+
+# Per-operation stats, filled in while instrumentation is enabled
+stats = {}
+
+_enabled = False
+_format = 'table'
+_output = None
+_profiler = None
+# Highest traced memory seen so far by each instrumented call in progress
+_active_peaks = []
+
+
+#Enable
+def enable(fmt='table', output=None):
+    """Start recording operation stats and print a summary at exit.
+
+    fmt is 'table' or 'json'; output is a file path, or None for stderr.
+    Peak memory is tracked with tracemalloc, which slows the program down
+    while it is on.
+    """
+    global _enabled, _format, _output
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _enabled:
+        atexit.register(report)
+    _enabled = True
+    _format = fmt
+    _output = output
+
+
+def enable_cprofile(path):
+    """Profile the whole run with cProfile and dump the stats to path at exit."""
+    global _profiler
+    import cProfile
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(_dump_cprofile, path)
+
+
+def _dump_cprofile(path):
+    global _profiler
+    _profiler.disable()
+    _profiler.dump_stats(path)
+    _profiler = None
+    print(f"cProfile stats written to {path} (view with: python -m pstats {path})", file=sys.stderr)
+
+
+def configure_from_env():
+    """Turn instrumentation on from FINANCE_PROFILE, FINANCE_PROFILE_OUTPUT and FINANCE_CPROFILE."""
+    mode = os.environ.get('FINANCE_PROFILE', '').lower()
+    if mode in ('1', 'true', 'yes', 'on', 'table', 'json'):
+        enable('json' if mode == 'json' else 'table', os.environ.get('FINANCE_PROFILE_OUTPUT'))
+    if os.environ.get('FINANCE_CPROFILE'):
+        enable_cprofile(os.environ['FINANCE_CPROFILE'])
+
+
+#Record operations
+def _count_rows(value):
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def instrumented(name, rows='argument'):
+    """Decorator that records wall time, calls, rows and peak memory for an operation.
+
+    rows says where the row count comes from: 'argument' (len of the first
+    argument), 'result' (len of the return value), 'count' (the return
+    value is the count) or None. When instrumentation is off the wrapper
+    costs one flag check.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            import tracemalloc
+            before, peak_so_far = tracemalloc.get_traced_memory()
+            # Keep the caller's peak before resetting it for this call
+            if _active_peaks:
+                _active_peaks[-1] = max(_active_peaks[-1], peak_so_far)
+            _active_peaks.append(before)
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                peak = max(tracemalloc.get_traced_memory()[1], _active_peaks.pop())
+                if _active_peaks:
+                    _active_peaks[-1] = max(_active_peaks[-1], peak)
+            if rows == 'result':
+                row_count = _count_rows(result)
+            elif rows == 'count':
+                row_count = result if isinstance(result, int) else None
+            elif rows == 'argument' and args:
+                row_count = _count_rows(args[0])
+            else:
+                row_count = None
+            entry = stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_bytes': 0})
+            entry['calls'] += 1
+            entry['seconds'] += elapsed
+            entry['rows'] += row_count or 0
+            entry['peak_bytes'] = max(entry['peak_bytes'], peak - before)
+            return result
+        return wrapper
+    return decorator
+
+
+#Report
+def summary():
+    """Return the recorded stats with rows/sec added."""
+    result = {}
+    for name, entry in stats.items():
+        rate = entry['rows'] / entry['seconds'] if entry['seconds'] > 0 and entry['rows'] else None
+        result[name] = dict(entry, rows_per_second=rate)
+    return result
+
+
+def format_table(data):
+    lines = [
+        f"{'Operation':<22} {'Calls':>6} {'Wall (s)':>10} {'Rows':>12} {'Rows/sec':>14} {'Peak MiB':>10}",
+        "-" * 79
+    ]
+    for name, entry in sorted(data.items()):
+        rate = f"{entry['rows_per_second']:,.0f}" if entry['rows_per_second'] else '-'
+        lines.append(f"{name:<22} {entry['calls']:>6} {entry['seconds']:>10.4f} {entry['rows']:>12,} "
+                     f"{rate:>14} {entry['peak_bytes'] / 1024 / 1024:>10.2f}")
+    return "\n".join(lines)
+
+
+def report():
+    """Write the summary in the configured format. Registered to run at exit."""
+    if not stats:
+        return
+    data = summary()
+    if _format == 'json':
+        import json
+        text = json.dumps(data, indent=2)
+    else:
+        text = format_table(data)
+    if _output:
+        with open(_output, 'w') as file:
+            file.write(text + "\n")
+    else:
+        print("\n" + text, file=sys.stderr)
+
+
+configure_from_env()
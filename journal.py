@@ -0,0 +1,386 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+import financial_utils
+from financial_utils import parse_date, read_csv_ledger, write_transactions_csv
+from instrumentation import instrumented
+from logger_config import logger
+from money import to_cents
+from transaction_store import TransactionStore
+
+# Saves start a background compaction once the journal holds this many entries
+COMPACT_THRESHOLD = 1000
+# CSV snapshots this large also get a binary copy (<filename>.snap, see binary_snapshot.py)
+# that later loads read instead of parsing the CSV
+BINARY_SNAPSHOT_MIN_BYTES = 1024 * 1024
+
+
+def file_crc(filename):
+    """Return the CRC32 of a file's contents, or 0 if it does not exist."""
+    crc = 0
+    try:
+        with open(filename, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                crc = zlib.crc32(block, crc)
+    except FileNotFoundError:
+        return 0
+    return crc
+
+
+def _read_header(line):
+    """Return a journal's header line as a dict, or None if it is torn or not a header."""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    return header if isinstance(header, dict) else None
+
+
+def _scan(lines):
+    """Return the compaction marker CRCs in journal lines and the largest ID their entries use."""
+    compacted = set()
+    last_id = 0
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict):
+            continue
+        if 'compacted' in entry:
+            compacted.add(entry['compacted'])
+        elif isinstance(entry.get('id'), int):
+            last_id = max(last_id, entry['id'])
+    return compacted, last_id
+
+
+def _entry(op, transaction):
+    """Build a journal entry for an add or update."""
+    return {
+        'op': op,
+        'id': transaction['id'],
+        'date': transaction['date'].strftime('%Y-%m-%d'),
+        'cents': transaction['amount'],
+        'type': transaction['type'],
+        'description': transaction['description']
+    }
+
+
+class TransactionJournal:
+    """Append-only change log that sits next to the transaction CSV.
+
+    The CSV is the snapshot. Adds, updates and deletes are recorded as JSON
+    lines keyed by transaction ID in <filename>.journal, and flush() only
+    appends the entries recorded since the last flush. compact() folds the
+    journal back into the CSV using an atomic temp-file-and-rename.
+
+    IDs are stored in the CSV's ID column and never change, so compaction
+    only drops deleted rows. The journal's first line stores the CRC32 of the
+    snapshot it applies to and the largest ID ever handed out, so the ID of a
+    row deleted before a compaction is not reused. Compaction appends the new
+    snapshot's CRC to the old journal before renaming the CSV into place, so
+    a journal left behind by a crash between the two renames is recognised
+    and discarded instead of being applied twice.
+
+    A large CSV is cached as a binary snapshot in <filename>.snap that
+    records the CSV's CRC32. load() reads the cache while the CRC matches
+    and falls back to the CSV (rewriting the cache) when it does not.
+    """
+
+    def __init__(self, filename='financial_transactions.csv'):
+        self.filename = filename
+        self.journal_filename = filename + '.journal'
+        self.binary_filename = filename + '.snap'
+        self.pending = []
+        self.entry_count = 0
+        self.snapshot_crc = None
+        self.last_id = 0
+        self.loaded = False
+        self.lock = threading.RLock()
+        self._compaction = None
+
+    #Load snapshot plus journal
+    @instrumented('journal.load', rows='result')
+    def load(self, columnar=False):
+        """Load the CSV snapshot and replay the journal on top of it."""
+        self.wait()
+        with self.lock:
+            financial_utils.transaction_counter = 0
+            self.last_id = 0
+            rows = {}
+            self.snapshot_crc = file_crc(self.filename)
+            lines = self._read_journal()
+            try:
+                for transaction in self._read_snapshot():
+                    rows[transaction['id']] = transaction
+            except FileNotFoundError:
+                logger.info(f"No snapshot at {self.filename}, starting from an empty ledger")
+            self.last_id = max(self.last_id, financial_utils.transaction_counter)
+            self.entry_count = sum(self._apply(rows, line) for line in lines)
+            self.pending = []
+            self.loaded = True
+
+            financial_utils.transaction_counter = self.last_id
+            logger.info(f"Loaded {len(rows)} transactions from {self.filename} "
+                        f"with {self.entry_count} journal entries")
+            transactions = list(rows.values())
+            return TransactionStore(transactions) if columnar else transactions
+
+    def _read_snapshot(self):
+        """Return the rows of the CSV snapshot, from its binary copy when that is up to date."""
+        transactions = self._read_binary_snapshot()
+        if transactions is not None:
+            return transactions
+        transactions = read_csv_ledger(self.filename)
+        if os.path.getsize(self.filename) >= BINARY_SNAPSHOT_MIN_BYTES:
+            self._write_binary_snapshot(transactions, self.snapshot_crc)
+        return transactions
+
+    def _read_binary_snapshot(self):
+        """Return the rows of <filename>.snap if it was made from the current CSV, else None."""
+        if not self.snapshot_crc:
+            return None
+        from binary_snapshot import SnapshotError, open_snapshot
+        try:
+            with open_snapshot(self.binary_filename) as snapshot:
+                if snapshot.source_crc != self.snapshot_crc:
+                    return None
+                transactions = list(snapshot)
+        except FileNotFoundError:
+            return None
+        except (OSError, SnapshotError, struct.error, UnicodeDecodeError, IndexError) as e:
+            logger.warning(f"Ignoring unreadable binary snapshot {self.binary_filename}: {str(e)}")
+            return None
+        financial_utils.transaction_counter = max((transaction['id'] for transaction in transactions), default=0)
+        logger.info(f"Read {len(transactions)} transactions from {self.binary_filename}")
+        return transactions
+
+    def _write_binary_snapshot(self, transactions, crc):
+        """Cache transactions, the contents of the CSV with this CRC, in <filename>.snap."""
+        from binary_snapshot import write_snapshot
+        try:
+            write_snapshot(transactions, self.binary_filename, crc)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write binary snapshot {self.binary_filename}: {str(e)}")
+
+    def _read_journal(self):
+        """Return the journal lines to replay on top of the snapshot.
+
+        Normally that is every line after the header. A journal whose header
+        names another snapshot is only discarded when it holds a compaction
+        marker with the current CSV's CRC, which proves its entries are
+        already in the CSV (a crash between the two renames of a compaction).
+        Any other mismatch, such as a CSV edited by hand, keeps the journal
+        and replays it with a warning; rows the CSV gained without an ID are
+        then numbered after every ID the journal has used.
+        """
+        self._cut_torn_line()
+        try:
+            with open(self.journal_filename, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return []
+        if not lines:
+            return []
+        header = _read_header(lines[0])
+        if header is None:
+            logger.warning(f"Journal {self.journal_filename} has an unreadable header {lines[0]!r}; "
+                           f"replaying its entries")
+            return lines
+        if header.get('snapshot') == self.snapshot_crc:
+            self.last_id = header.get('last_id', 0)
+            return lines[1:]
+        compacted, last_id = _scan(lines[1:])
+        if self.snapshot_crc in compacted:
+            logger.info(f"Discarding journal {self.journal_filename}: it was already compacted into {self.filename}")
+            os.remove(self.journal_filename)
+            return []
+        logger.warning(f"{self.filename} changed after journal {self.journal_filename} was written "
+                       f"(edited by hand?); replaying the journal on top of it")
+        self.last_id = max(header.get('last_id', 0), last_id)
+        financial_utils.transaction_counter = self.last_id
+        return lines[1:]
+
+    def _cut_torn_line(self):
+        """Truncate the journal after its last complete line.
+
+        A crash mid-append can leave a final line without its newline. It is
+        skipped on load, and cutting it off means the next flush starts on a
+        fresh line instead of being glued onto the fragment.
+        """
+        try:
+            with open(self.journal_filename, 'r+b') as file:
+                data = file.read()
+                end = data.rfind(b'\n') + 1
+                if end == len(data):
+                    return
+                logger.warning(f"Removing torn final line from {self.journal_filename}: {data[end:]!r}")
+                file.truncate(end)
+                file.flush()
+                os.fsync(file.fileno())
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, rows, line):
+        """Apply one journal line to rows. Returns 1 if it was applied.
+
+        A line that is not a complete add, update or delete entry, such as a
+        torn final line from a crash mid-append, is logged and skipped.
+        """
+        try:
+            entry = json.loads(line)
+            if isinstance(entry, dict) and 'compacted' in entry:
+                return 0
+            op = entry['op']
+            transaction_id = entry['id']
+            if op not in ('add', 'update', 'delete'):
+                raise ValueError(f"unknown op {op!r}")
+            if not isinstance(transaction_id, int):
+                raise ValueError(f"ID is not an integer: {transaction_id!r}")
+            if op != 'delete':
+                transaction = {
+                    'id': transaction_id,
+                    'date': parse_date(entry['date']),
+                    'amount': entry['cents'] if 'cents' in entry else to_cents(entry['amount']),
+                    'type': entry['type'],
+                    'description': entry['description']
+                }
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping unreadable journal line: {line!r} ({str(e)})")
+            return 0
+        self.last_id = max(self.last_id, transaction_id)
+        if op == 'delete':
+            rows.pop(transaction_id, None)
+        else:
+            rows[transaction_id] = transaction
+        return 1
+
+    #Record changes
+    def record_add(self, transaction):
+        with self.lock:
+            self.pending.append(_entry('add', transaction))
+            self.last_id = max(self.last_id, transaction['id'])
+
+    def record_update(self, transaction):
+        with self.lock:
+            self.pending.append(_entry('update', transaction))
+
+    def record_delete(self, transaction_id):
+        with self.lock:
+            self.pending.append({'op': 'delete', 'id': transaction_id})
+
+    #Flush
+    @instrumented('journal.flush', rows='count')
+    def flush(self):
+        """Append pending entries to the journal file and fsync it.
+
+        While a background compaction is running the entries stay pending and
+        are written to the fresh journal once it finishes.
+        """
+        with self.lock:
+            if not self.loaded:
+                raise RuntimeError("Load the ledger through the journal before flushing it")
+            if not self.pending or self._compaction is not None:
+                return 0
+            new_file = not os.path.exists(self.journal_filename) or os.path.getsize(self.journal_filename) == 0
+            with open(self.journal_filename, 'a') as file:
+                if new_file:
+                    file.write(self._header(self.snapshot_crc))
+                file.writelines(json.dumps(entry) + '\n' for entry in self.pending)
+                file.flush()
+                os.fsync(file.fileno())
+            written = len(self.pending)
+            self.entry_count += written
+            self.pending = []
+            logger.info(f"Flushed {written} journal entries to {self.journal_filename}")
+            return written
+
+    #Compact
+    def compact(self, transactions, background=False):
+        """Fold the journal into the CSV snapshot.
+
+        The current rows are copied under the lock, IDs and all. The CSV is
+        then rewritten through a temp file and os.replace, and the journal is
+        replaced by an empty one for the new snapshot. With background=True
+        the file writing runs in a thread; call wait() to block until it is
+        done.
+        """
+        self.wait()
+        with self.lock:
+            self.loaded = True
+            snapshot = list(transactions)
+            self.last_id = max(self.last_id, max((t['id'] for t in snapshot), default=0))
+            self.pending = []
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+            self._compaction.start()
+        if not background:
+            self.wait()
+
+    def compact_if_needed(self, transactions):
+        """Start a background compaction once the journal reaches COMPACT_THRESHOLD entries.
+
+        Returns True if a compaction was started.
+        """
+        if self.entry_count >= COMPACT_THRESHOLD and self._compaction is None:
+            self.compact(transactions, background=True)
+            return True
+        return False
+
+    def _write_snapshot(self, snapshot):
+        try:
+            write_transactions_csv(snapshot, self.filename, before_replace=self._mark_compacted)
+            crc = file_crc(self.filename)
+            if os.path.getsize(self.filename) >= BINARY_SNAPSHOT_MIN_BYTES:
+                self._write_binary_snapshot(snapshot, crc)
+            temp_filename = self.journal_filename + '.tmp'
+            with open(temp_filename, 'w') as file:
+                file.write(self._header(crc))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_filename, self.journal_filename)
+            with self.lock:
+                self.snapshot_crc = crc
+                self.entry_count = 0
+            logger.info(f"Compacted {len(snapshot)} transactions into {self.filename}")
+        except Exception as e:
+            logger.error(f"Error compacting journal: {str(e)}", exc_info=True)
+        finally:
+            with self.lock:
+                self._compaction = None
+            self.flush()
+
+    def _mark_compacted(self, temp_filename):
+        """Record in the current journal that the new CSV in temp_filename holds all of its entries.
+
+        Written before the new CSV is renamed into place, so a journal that
+        is left behind by a crash can be recognised as already folded in.
+        """
+        if not os.path.exists(self.journal_filename):
+            return
+        with open(self.journal_filename, 'a') as file:
+            file.write(json.dumps({'compacted': file_crc(temp_filename)}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _header(self, crc):
+        """Return the first line of a journal that applies to the snapshot with this CRC."""
+        with self.lock:
+            return json.dumps({'snapshot': crc, 'last_id': self.last_id}) + '\n'
+
+    def wait(self):
+        """Block until a running background compaction has finished."""
+        compaction = self._compaction
+        if compaction is not None and compaction is not threading.current_thread():
+            compaction.join()
+
+
+def open_journal(filename):
+    """Return the change log for a ledger: a SQLiteLedger for SQLite files, else a TransactionJournal."""
+    if financial_utils.is_sqlite_file(filename):
+        from sqlite_ledger import SQLiteLedger
+        return SQLiteLedger(filename)
+    return TransactionJournal(filename)
+
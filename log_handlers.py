@@ -0,0 +1,40 @@
+import logging
+import logging.handlers
+import threading
+import time
+
+# Kept apart from logger_config so that logging.handlers (which pulls in
+# socket, pickle and queue) is only imported when async logging is used
+
+
+class BatchingHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that also flushes once its oldest record is flush_interval seconds old.
+
+    A daemon thread wakes up when the oldest buffered record is due, so
+    records are written on time even when no new record arrives.
+    """
+
+    def __init__(self, capacity, target, flush_interval):
+        super().__init__(capacity, flushLevel=logging.ERROR, target=target, flushOnClose=True)
+        self.flush_interval = flush_interval
+        self._stopped = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name='log-flush', daemon=True)
+        self._timer.start()
+
+    def shouldFlush(self, record):
+        return (super().shouldFlush(record)
+                or record.created - self.buffer[0].created >= self.flush_interval)
+
+    def _flush_periodically(self):
+        delay = self.flush_interval
+        while not self._stopped.wait(delay):
+            with self.lock:
+                age = time.time() - self.buffer[0].created if self.buffer else 0
+                if age >= self.flush_interval:
+                    self.flush()
+                    age = 0
+            delay = self.flush_interval - age
+
+    def close(self):
+        self._stopped.set()
+        super().close()
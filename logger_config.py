@@ -1,37 +1,194 @@
+import atexit
 import logging
 import os
+import threading
 from datetime import datetime
 
-# Create logs directory if it doesn't exist
-if not os.path.exists('logs'):
-    os.makedirs('logs')
+LOG_DIR = 'logs'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Async mode: records are written in batches of this many, or sooner for errors
+BATCH_SIZE = 200
+# ...or once the oldest buffered record is this many seconds old
+FLUSH_INTERVAL = 1.0
+# Size-based rotation defaults
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+_listener = None
+_configured = False
+# An unknown level name seen by _level(), reported once the logger is set up
+_invalid_level = None
+_setup_lock = threading.RLock()
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _level(level=None):
+    """Return the file log level as a number: level, else FINANCE_LOG_LEVEL, else DEBUG.
+
+    An unknown level name falls back to INFO; the setup logs a warning about it.
+    """
+    global _invalid_level
+    level = level or os.environ.get('FINANCE_LOG_LEVEL', 'DEBUG')
+    if isinstance(level, str):
+        name = level
+        level = logging.getLevelName(name.upper())
+        if not isinstance(level, int):
+            _invalid_level = name
+            level = logging.INFO
+    return level
+
+
+def _file_handler(log_dir, rotate, max_bytes, backup_count):
+    """Create the log file handler.
+
+    rotate=None keeps the original one-file-per-day naming, 'size' rotates
+    when the file reaches max_bytes and 'time' rotates at midnight.
+    """
+    if rotate == 'size':
+        from logging.handlers import RotatingFileHandler
+        return RotatingFileHandler(
+            os.path.join(log_dir, 'finance_app.log'), maxBytes=max_bytes, backupCount=backup_count)
+    if rotate == 'time':
+        from logging.handlers import TimedRotatingFileHandler
+        return TimedRotatingFileHandler(
+            os.path.join(log_dir, 'finance_app.log'), when='midnight', backupCount=backup_count)
+    return logging.FileHandler(os.path.join(log_dir, f'finance_app_{datetime.now().strftime("%Y-%m-%d")}.log'))
+
 
 # Configure logging
-def setup_logger():
+def setup_logger(async_logging=None, level=None, rotate=None, log_dir=LOG_DIR,
+                 max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, batch_size=BATCH_SIZE):
+    """Configure the finance_app logger.
+
+    By default records are written synchronously by a console handler (INFO)
+    and a daily file handler (DEBUG). With async_logging=True, or the
+    FINANCE_LOG_ASYNC environment variable set, the logger only puts records
+    on a queue; a QueueListener thread writes them out, and file writes are
+    batched batch_size records (or FLUSH_INTERVAL seconds) at a time.
+    level (or FINANCE_LOG_LEVEL) sets the file level, and rotate (or
+    FINANCE_LOG_ROTATE) chooses 'size' or 'time' rotation. Calling it again
+    replaces the previous configuration.
+    """
+    with _setup_lock:
+        return _setup(async_logging, level, rotate, log_dir, max_bytes, backup_count, batch_size)
+
+
+def _setup(async_logging, level, rotate, log_dir, max_bytes, backup_count, batch_size):
+    global _listener, _configured
+    if async_logging is None:
+        async_logging = _env_flag('FINANCE_LOG_ASYNC')
+    level = _level(level)
+    rotate = rotate or os.environ.get('FINANCE_LOG_ROTATE') or None
+
     # Create a logger
     logger = logging.getLogger('finance_app')
-    logger.setLevel(logging.DEBUG)
+    _stop_listener()
+    # Swap in a new list rather than removing handlers one by one, so a
+    # record being dispatched to the old handlers is not affected
+    old_handlers, logger.handlers = logger.handlers, []
+    for handler in old_handlers:
+        handler.close()
+    _configured = True
+    # Let debug calls short-circuit when nothing would record them
+    logger.setLevel(min(level, logging.INFO))
 
     # Create handlers
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    
-    # File handler - creates a new log file for each day
-    log_filename = f'logs/finance_app_{datetime.now().strftime("%Y-%m-%d")}.log'
-    file_handler = logging.FileHandler(log_filename)
-    file_handler.setLevel(logging.DEBUG)
+
+    # File handler
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = _file_handler(log_dir, rotate, max_bytes, backup_count)
+    file_handler.setLevel(level)
 
     # Create formatters and add it to handlers
-    log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    log_format = logging.Formatter(LOG_FORMAT)
     console_handler.setFormatter(log_format)
     file_handler.setFormatter(log_format)
 
-    # Add handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    if not async_logging:
+        # Add handlers to the logger
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        _warn_invalid_level(logger)
+        return logger
 
+    # Buffer file writes; errors are flushed straight away
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+    from log_handlers import BatchingHandler
+    batched_file_handler = BatchingHandler(batch_size, file_handler, FLUSH_INTERVAL)
+    batched_file_handler.setLevel(level)
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(
+        log_queue, console_handler, batched_file_handler, respect_handler_level=True)
+    _listener.start()
+    _warn_invalid_level(logger)
     return logger
 
-# Create and configure the logger
-logger = setup_logger() 
\ No newline at end of file
+
+def _warn_invalid_level(logger):
+    global _invalid_level
+    if _invalid_level is not None:
+        logger.warning(f"Unknown log level {_invalid_level!r}, using INFO")
+        _invalid_level = None
+
+
+def _stop_listener():
+    """Stop the background writer, flushing anything still queued or buffered."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        target = getattr(handler, 'target', None)
+        handler.close()
+        if target is not None:
+            target.close()
+    _listener = None
+
+
+def configure_logger():
+    """Set the logger up from the environment unless that has already been done, and return it.
+
+    Safe to call any number of times; only the first call (or an explicit
+    setup_logger()) attaches handlers.
+    """
+    with _setup_lock:
+        if not _configured:
+            _setup(None, None, None, LOG_DIR, MAX_BYTES, BACKUP_COUNT, BATCH_SIZE)
+    return logger
+
+
+class _DeferredSetup(logging.Handler):
+    """Stand-in handler that sets the logger up when the first record arrives.
+
+    Importing this module therefore creates no log directory or file, which
+    keeps short-lived commands and imports that never log free of them. The
+    first record runs configure_logger() and is passed on to the real
+    handlers. A level set on the logger since import is kept.
+    """
+
+    def handle(self, record):
+        level = logger.level
+        configure_logger()
+        logger.setLevel(level)
+        for handler in logger.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+atexit.register(_stop_listener)
+
+# The logger is set up when it first logs something (see _DeferredSetup)
+logger = logging.getLogger('finance_app')
+if not logger.handlers:
+    logger.setLevel(min(_level(), logging.INFO))
+    logger.addHandler(_DeferredSetup())
@@ -1,24 +1,33 @@
 #main.py
-import csv
-from datetime import datetime
+import os
+import sys
 from logger_config import logger
 
-CSV_FILE = 'financial_transactions.csv'
-
-from financial_utils import (
-    load_transactions,
-    add_transaction,
-    view_transactions,
-    update_transaction,
-    delete_transaction,
-    analyze_finances,
-    save_transactions,
-    generate_report
-)
+# Set FINANCE_LEDGER to a .db/.sqlite file to keep the ledger in SQLite
+CSV_FILE = os.environ.get('FINANCE_LEDGER', 'financial_transactions.csv')
 
 def main():
+    # Imported here so batch commands (see cli.py) only load what they use
+    from financial_utils import (
+        load_transactions,
+        add_transaction,
+        browse_transactions,
+        update_transaction,
+        delete_transaction,
+        analyze_finances,
+        save_transactions,
+        generate_report
+    )
+    from journal import open_journal
+    from result_cache import cache
+    from running_totals import RunningTotals
+    from transaction_index import TransactionIndex
+
     logger.info("Starting Smart Personal Finance Analyzer")
     transactions = []
+    journal = open_journal(CSV_FILE)
+    totals = RunningTotals()
+    transaction_index = TransactionIndex()
     while True:
         print("\nSmart Personal Finance Analyzer")
         print("1. Load Transactions")
@@ -34,7 +43,9 @@ def main():
 
         if choice == '1':
             logger.info("Loading transactions from file")
-            transactions = load_transactions('financial_transactions.csv')
+            transactions = load_transactions(CSV_FILE, journal=journal)
+            totals.rebuild(transactions)
+            transaction_index.rebuild(transactions)
         elif choice == '2':
             try:
                 logger.info("Starting new transaction entry")
@@ -48,7 +59,8 @@ def main():
                     continue
                 logger.debug(f"Date entered: {date_str}")
                 
-                amount = float(input("Enter amount: "))
+                # Kept as text; add_transaction parses it straight to cents
+                amount = input("Enter amount: ")
                 logger.debug(f"Amount entered: {amount}")
                 
                 trans_type = input("Enter type (credit/debit): ")
@@ -65,7 +77,7 @@ def main():
                 }
                 logger.debug(f"Transaction object created: {new_transaction}")
                 
-                transactions = add_transaction(transactions, new_transaction)
+                transactions = add_transaction(transactions, new_transaction, journal, totals, transaction_index)
             except ValueError as e:
                 logger.error(f"Value error in transaction entry: {str(e)}")
                 print(f"Error in main: {str(e)}")
@@ -76,24 +88,26 @@ def main():
                 print(f"Error type: {type(e)}")
         elif choice == '3':
             logger.info("Viewing transactions")
-            view_transactions(transactions)
+            browse_transactions(transactions, transaction_index)
         elif choice == '4':
             logger.info("Updating transaction")
-            transactions = update_transaction(transactions)
+            transactions = update_transaction(transactions, journal, totals, transaction_index)
         elif choice == '5':
             logger.info("Deleting transaction")
-            transactions = delete_transaction(transactions)
+            transactions = delete_transaction(transactions, journal, totals, transaction_index)
         elif choice == '6':
             logger.info("Analyzing finances")
-            analyze_finances(transactions)
+            analyze_finances(transactions, totals)
         elif choice == '7':
             logger.info("Saving transactions to file")
-            save_transactions(transactions, 'financial_transactions.csv')
+            save_transactions(transactions, CSV_FILE, journal)
         elif choice == '8':
             logger.info("Generating report")
-            generate_report(transactions)
+            generate_report(transactions, totals)
         elif choice == '9':
             logger.info("Exiting application")
+            logger.info("Result cache stats: %s", cache.stats())
+            journal.wait()
             print("Goodbye!")
             break
         else:
@@ -102,7 +116,11 @@ def main():
 
 if __name__ == "__main__":
     try:
+        if len(sys.argv) > 1:
+            from cli import run_batch
+            sys.exit(run_batch(sys.argv[1:]))
         main()
     except Exception as e:
         logger.critical(f"Critical error in main program: {str(e)}", exc_info=True)
         print("A critical error occurred. Please check the logs for details.")
+        sys.exit(1)
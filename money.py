@@ -0,0 +1,67 @@
+# Money is held as integer cents everywhere inside the app. Text from CSV
+# files and user input is parsed straight to cents, and cents are only
+# turned back into dollars when they are printed or written out.
+
+# Every store (TransactionStore arrays, SQLite, binary snapshots) keeps cents
+# in a signed 64-bit integer, so amounts are limited to this many cents either way
+MAX_CENTS = 2 ** 63 - 1
+
+
+def _in_range(cents, text):
+    if -MAX_CENTS <= cents <= MAX_CENTS:
+        return cents
+    raise ValueError(f"amount out of range: {text!r}")
+
+
+def parse_cents(text):
+    """Parse a dollar amount such as '45.67', '-3' or '1e2' into integer cents.
+
+    Plain decimals with up to two fraction digits are converted without
+    going through float. Anything else is parsed as a Decimal and rounded
+    half-up to the cent. Raises ValueError for text that is not a number
+    or is more than MAX_CENTS cents either way.
+    """
+    whole, _, fraction = text.partition('.')
+    if len(fraction) == 2 and fraction.isdigit() and '_' not in whole:
+        # The usual CSV form, e.g. '45.67' or '-0.05'
+        try:
+            cents = int(whole + fraction)
+        except ValueError:
+            pass
+        else:
+            return _in_range(cents, text)
+    text = text.strip()
+    body = text[1:] if text[:1] in ('+', '-') else text
+    whole, _, fraction = body.partition('.')
+    if (whole or fraction) and (not whole or whole.isdecimal()) and (not fraction or fraction.isdecimal()) \
+            and len(fraction) <= 2:
+        cents = int(whole or '0') * 100 + int(fraction.ljust(2, '0'))
+        return _in_range(-cents if text.startswith('-') else cents, text)
+    # Exponents and extra fraction digits are rare, so decimal is only imported for them
+    from decimal import ROUND_HALF_UP, Decimal
+    try:
+        value = Decimal(text)
+    except ArithmeticError:
+        raise ValueError(f"could not convert string to an amount: {text!r}")
+    if not value.is_finite():
+        raise ValueError(f"could not convert string to an amount: {text!r}")
+    if abs(value) >= 10 ** 18:
+        # Too many digits to quantize, and far out of range anyway
+        raise ValueError(f"amount out of range: {text!r}")
+    return _in_range(int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)), text)
+
+
+def to_cents(amount):
+    """Convert a dollar amount given as text, int or float into integer cents."""
+    if isinstance(amount, str):
+        return parse_cents(amount)
+    if isinstance(amount, float):
+        return parse_cents(repr(amount))
+    return _in_range(amount * 100, amount)
+
+
+def format_cents(cents):
+    """Format integer cents as a plain dollar string such as '-45.07', exactly."""
+    sign = '-' if cents < 0 else ''
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{fraction:02d}"
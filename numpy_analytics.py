@@ -0,0 +1,136 @@
+from aggregation import aggregate_transactions
+from transaction_store import TransactionStore
+
+# Below this many rows building arrays costs more than the pure-Python pass
+NUMPY_MIN_ROWS = 50000
+
+# datetime.toordinal() of 1970-01-01, the numpy datetime64 epoch
+EPOCH_ORDINAL = 719163
+
+_numpy = None
+
+
+def numpy_available():
+    """Return True if NumPy can be imported. The import happens on first use."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy is not False
+
+
+#Choose a backend
+def aggregate(transactions, backend='auto'):
+    """Aggregate transactions with NumPy when it helps, otherwise in pure Python.
+
+    backend is 'auto', 'numpy' or 'python'. 'auto' uses NumPy for sized
+    ledgers of at least NUMPY_MIN_ROWS rows when it is installed. Both
+    backends return the aggregate_transactions dict shape, so the rendered
+    analysis is the same either way.
+    """
+    if backend == 'python' or not numpy_available():
+        return aggregate_transactions(transactions)
+    if backend == 'auto' and (not hasattr(transactions, '__len__') or len(transactions) < NUMPY_MIN_ROWS):
+        return aggregate_transactions(transactions)
+    return aggregate_numpy(transactions)
+
+
+def _columns(transactions):
+    """Return (cents, ordinals, category codes, category names) as NumPy arrays.
+
+    Category names are the lowercased descriptions and the codes index into
+    them. TransactionStore and Snapshot columns are used without copying
+    row by row; a list of dicts is read once.
+    """
+    np = _numpy
+    if isinstance(transactions, TransactionStore):
+        cents = np.frombuffer(transactions.cents, dtype=np.int64)
+        ordinals = np.frombuffer(transactions.dates, dtype=np.int32)
+        description_codes = np.frombuffer(transactions.categories, dtype=np.int32)
+        descriptions = transactions.category_table
+    elif hasattr(transactions, 'as_numpy'):
+        records = transactions.as_numpy()
+        cents = records['cents']
+        ordinals = records['date']
+        description_codes = records['category']
+        descriptions = transactions.category_table
+    else:
+        count = len(transactions)
+        cents = np.fromiter((t['amount'] for t in transactions), dtype=np.int64, count=count)
+        ordinals = np.fromiter((t['date'].toordinal() for t in transactions), dtype=np.int32, count=count)
+        lookup = {}
+        description_codes = np.fromiter((lookup.setdefault(t['description'], len(lookup)) for t in transactions),
+                                        dtype=np.int32, count=count)
+        descriptions = list(lookup)
+
+    # Descriptions that differ only by case share a category
+    names = sorted(set(d.lower() for d in descriptions))
+    name_codes = {name: code for code, name in enumerate(names)}
+    remap = np.array([name_codes[d.lower()] for d in descriptions], dtype=np.int64)
+    return cents, ordinals, remap[description_codes] if len(remap) else description_codes.astype(np.int64), names
+
+
+def _int_sums(sums):
+    """Convert float64 bincount sums of whole cents back to a list of ints."""
+    return _numpy.rint(sums).astype(_numpy.int64).tolist()
+
+
+#Vectorized aggregation
+def aggregate_numpy(transactions):
+    """Compute the aggregate_transactions result with vectorized NumPy operations.
+
+    Amounts are summed as integer cents with np.bincount, grouped by month
+    code, category code and the combined (month, category) code. bincount
+    sums in float64, which is exact for totals below 2**53 cents, and the
+    results are rounded back to int.
+    """
+    if not numpy_available():
+        raise ImportError("NumPy is required for the numpy analytics backend")
+    np = _numpy
+    cents, ordinals, categories, names = _columns(transactions)
+    if len(cents) == 0:
+        return aggregate_transactions([])
+
+    debit_mask = cents < 0
+    debit_cents = np.where(debit_mask, -cents, 0)
+    credit_cents = np.where(cents > 0, cents, 0)
+
+    # Months since 1970-01, then compacted to 0..M-1
+    month_numbers = (ordinals.astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    month_values, months = np.unique(month_numbers, return_inverse=True)
+    month_count = len(month_values)
+    category_count = len(names)
+
+    month_rows = np.bincount(months, minlength=month_count).tolist()
+    month_debits = _int_sums(np.bincount(months, weights=debit_cents, minlength=month_count))
+    month_credits = _int_sums(np.bincount(months, weights=credit_cents, minlength=month_count))
+    category_totals = _int_sums(np.bincount(categories, weights=cents, minlength=category_count))
+    category_rows = np.bincount(categories, minlength=category_count).tolist()
+
+    # Only the (month, category) pairs that occur, not the full grid
+    pairs, pair_index = np.unique(months * category_count + categories, return_inverse=True)
+    pair_totals = _int_sums(np.bincount(pair_index, weights=cents, minlength=len(pairs)))
+
+    month_summaries = {}
+    for code, value in enumerate(month_values.tolist()):
+        month_summaries[(1970 + value // 12, value % 12 + 1)] = {
+            'count': month_rows[code],
+            'debits': month_debits[code],
+            'credits': month_credits[code],
+            'categories': {}
+        }
+    keys = list(month_summaries)
+    for pair, total in zip(pairs.tolist(), pair_totals):
+        month_summaries[keys[pair // category_count]]['categories'][names[pair % category_count]] = total
+
+    return {
+        'count': len(cents),
+        'debits': int(debit_cents.sum()),
+        'credits': int(credit_cents.sum()),
+        'categories': {names[code]: category_totals[code]
+                       for code in range(category_count) if category_rows[code]},
+        'months': month_summaries
+    }
@@ -0,0 +1,191 @@
+import csv
+import io
+import locale
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import financial_utils
+import result_cache
+from financial_utils import parse_date
+from logger_config import logger
+from money import parse_cents
+from transaction_store import TransactionStore
+
+# Files smaller than this are parsed as a single piece
+MIN_PIECE_BYTES = 1024 * 1024
+
+# Marks a row without an ID column in a piece's ids array
+NO_ID = -2 ** 63
+
+
+#Split files
+def split_file(filename, pieces):
+    """Split a CSV file into at most `pieces` byte ranges that start and end on record boundaries.
+
+    The header row is excluded. Returns a list of (filename, start, end)
+    tuples in file order. A boundary is a newline with an even number of
+    quote characters before it, so a quoted description that spans lines
+    is never cut in two. That holds for files written by csv.writer, which
+    quotes every field containing a quote character.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as file:
+        quotes = _finish_record(file, 0)  # Skip the header row
+        start = position = file.tell()
+        bounds = [start]
+        for i in range(1, pieces):
+            target = start + (size - start) * i // pieces
+            if target <= position:
+                continue
+            quotes += _count_quotes(file, target - position)
+            quotes = _finish_record(file, quotes)
+            position = file.tell()
+            if position >= size:
+                break
+            bounds.append(position)
+        bounds.append(size)
+    return [(filename, a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _count_quotes(file, length):
+    """Read length bytes from file and return how many quote characters they hold."""
+    quotes = 0
+    while length > 0:
+        block = file.read(min(length, MIN_PIECE_BYTES))
+        if not block:
+            break
+        quotes += block.count(b'"')
+        length -= len(block)
+    return quotes
+
+
+def _finish_record(file, quotes):
+    """Read on to the end of the current CSV record and return the running quote count."""
+    while True:
+        line = file.readline()
+        quotes += line.count(b'"')
+        if not line or quotes % 2 == 0:
+            return quotes
+
+
+def _plan(filenames, workers):
+    """Build the ordered list of byte ranges to parse across all files."""
+    # Decode as open() does in the sequential loader (iter_transactions)
+    encoding = locale.getpreferredencoding(False)
+    tasks = []
+    for filename in filenames:
+        size = os.path.getsize(filename)
+        pieces = max(1, min(workers, size // MIN_PIECE_BYTES))
+        tasks.extend((piece, encoding) for piece in split_file(filename, pieces))
+    return tasks
+
+
+#Parse one piece (runs in a worker process)
+def _parse_range(task):
+    """Parse one byte range into compact columns.
+
+    Returns (ids, dates, amounts, types, descriptions, errors) where dates
+    are day ordinals and amounts are signed integer cents. ids holds the
+    ID column, or NO_ID for rows without one; those are numbered by the
+    parent during the merge so they stay deterministic.
+    """
+    (filename, start, end), encoding = task
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    ids = array('q')
+    dates = array('i')
+    amounts = array('q')
+    types = []
+    descriptions = []
+    errors = []
+    # Parsed exactly as iter_transactions reads the file, line endings and all
+    for row in csv.reader(io.StringIO(data.decode(encoding), newline='')):
+        try:
+            date = parse_date(row[0]).toordinal()
+            amount = parse_cents(row[1])
+            transaction_type = row[2].lower()
+            if transaction_type == 'debit':
+                amount = -amount
+            description = row[3]
+            row_id = int(row[4]) if len(row) > 4 and row[4] else NO_ID
+        except (ValueError, IndexError) as e:
+            errors.append(f"Error parsing row: {row}, Error: {str(e)}")
+            continue
+        ids.append(row_id)
+        dates.append(date)
+        amounts.append(amount)
+        types.append(transaction_type)
+        descriptions.append(description)
+    return ids, dates, amounts, types, descriptions, errors
+
+
+#Parallel load
+def read_transactions_parallel(filenames, workers=None, columnar=False):
+    """Parse one or more CSV files using a pool of worker processes and return the rows.
+
+    Large files are split on record boundaries so several workers can
+    parse them at once. Partial results are merged in file order. Rows
+    keep the IDs in their ID column and the rest are numbered from the
+    global transaction counter during the merge, so the result matches
+    iter_transactions on each file in turn. A missing file raises
+    FileNotFoundError.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    workers = workers or os.cpu_count() or 1
+    transactions = TransactionStore() if columnar else []
+    tasks = _plan(filenames, workers)
+    logger.info(f"Loading {len(filenames)} file(s) in {len(tasks)} piece(s) with {workers} worker(s)")
+    if workers == 1 or len(tasks) <= 1:
+        _merge(map(_parse_range, tasks), transactions)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            _merge(executor.map(_parse_range, tasks), transactions)
+    return transactions
+
+
+def load_transactions_parallel(filenames, workers=None, columnar=False):
+    """Load one or more CSV files with read_transactions_parallel, reporting the result like load_transactions."""
+    try:
+        transactions = read_transactions_parallel(filenames, workers, columnar)
+    except FileNotFoundError as e:
+        logger.warning(f"Transaction file not found: {e.filename}")
+        print(f"\nTransaction file not found: {e.filename}")
+        return TransactionStore() if columnar else []
+
+    result_cache.bump_version()
+    logger.info(f"Successfully loaded {len(transactions)} transactions")
+    print(f"Total transactions loaded: {len(transactions)}")
+    return transactions
+
+
+def _merge(results, transactions):
+    """Append partial results to transactions in order, numbering rows that have no ID."""
+    for ids, dates, amounts, types, descriptions, errors in results:
+        for error in errors:
+            logger.warning(error)
+        ids = [_row_id(row_id) for row_id in ids]
+        if isinstance(transactions, TransactionStore):
+            for row_id, date, amount, transaction_type, description in zip(ids, dates, amounts, types, descriptions):
+                transactions.append_row(row_id, date, amount, transaction_type, description)
+            continue
+        for row_id, date, amount, transaction_type, description in zip(ids, dates, amounts, types, descriptions):
+            transactions.append({
+                'id': row_id,
+                'date': datetime.fromordinal(date),
+                'amount': amount,
+                'type': transaction_type,
+                'description': description
+            })
+
+
+def _row_id(row_id):
+    """Return a row's ID as parse_row would: its own, moving the counter past it, or the next one."""
+    if row_id == NO_ID:
+        return financial_utils.get_next_transaction_id()
+    financial_utils.transaction_counter = max(financial_utils.transaction_counter, row_id)
+    return row_id
@@ -0,0 +1,191 @@
+import csv
+import json
+from datetime import datetime
+
+from instrumentation import instrumented
+from money import format_cents
+from numpy_analytics import aggregate
+
+# Large write buffer so row listings are flushed in big blocks
+BUFFER_SIZE = 1024 * 1024
+
+FORMATS = ('txt', 'csv', 'json')
+
+
+def report_format(filename, fmt=None):
+    """Return the report format to use: fmt if given, else the file extension, else txt."""
+    if fmt:
+        fmt = fmt.lower()
+    elif isinstance(filename, str) and '.' in filename:
+        fmt = filename.rsplit('.', 1)[1].lower()
+    else:
+        fmt = 'txt'
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported report format: {fmt} (expected one of {', '.join(FORMATS)})")
+    return fmt
+
+
+def _percentage(amount, total):
+    return abs(amount) / total * 100 if total > 0 else 0.0
+
+
+#Write report
+@instrumented('write_report')
+def write_report(transactions, output='report.txt', fmt=None, summary=None, include_rows=True):
+    """Write a financial report as TXT, CSV or JSON and return the summary it used.
+
+    output is a filename or an open text file. The figures come from one
+    aggregation pass (or from summary, e.g. RunningTotals.summary()); the
+    row listings are then streamed from transactions, which must be
+    re-iterable (a list, TransactionStore or Snapshot), so nothing besides
+    the summary is held in memory.
+    """
+    fmt = report_format(output, fmt)
+    if summary is None:
+        summary = aggregate(transactions)
+    writer = {'txt': _write_txt, 'csv': _write_csv, 'json': _write_json}[fmt]
+    if isinstance(output, str):
+        with open(output, 'w', newline='', buffering=BUFFER_SIZE) as file:
+            writer(file, transactions, summary, include_rows)
+    else:
+        writer(output, transactions, summary, include_rows)
+    return summary
+
+
+def _write_txt(file, transactions, summary, include_rows):
+    debits = summary['debits']
+    credits = summary['credits']
+    total = debits + credits
+    rule = "-" * 80 + "\n"
+    write = file.write
+
+    write("FINANCIAL TRANSACTION REPORT\n")
+    write("=" * 80 + "\n\n")
+    write("SUMMARY\n" + rule)
+    write(f"Total Transactions: {summary['count']}\n")
+    write(f"Total Amount: ${format_cents(total)}\n\n")
+
+    write("TOTALS AND PERCENTAGES\n" + rule)
+    write(f"{'Category':<15} {'Amount':<15} {'Percentage':<15}\n" + rule)
+    write(f"{'Debits':<15} {'$' + format_cents(debits):<15} {_percentage(debits, total):<14.1f}%\n")
+    write(f"{'Credits':<15} {'$' + format_cents(credits):<15} {_percentage(credits, total):<14.1f}%\n")
+    write(f"{'Net Balance':<15} {'$' + format_cents(credits - debits):<15} {_percentage(credits - debits, total):<14.1f}%\n\n")
+
+    if include_rows:
+        write("TRANSACTIONS BY TYPE\n" + rule)
+        for title, wanted in (("CREDIT TRANSACTIONS (Money In):", 1), ("DEBIT TRANSACTIONS (Money Out):", -1)):
+            write(f"\n{title}\n" + rule)
+            write(f"{'Date':<12} {'Amount':<15} {'Description':<40}\n" + rule)
+            for t in transactions:
+                amount = t['amount']
+                if (amount < 0) == (wanted < 0):
+                    write(f"{t['date'].strftime('%Y-%m-%d'):<12} {'$' + format_cents(abs(amount)):<15} {t['description']:<40}\n")
+        write("\n")
+
+    write("CATEGORY SUMMARY\n" + rule)
+    write(f"{'Category':<30} {'Amount':<15} {'Type':<8} {'% of Total':<10}\n" + rule)
+    for category, amount in sorted(summary['categories'].items()):
+        kind = 'debit' if amount < 0 else 'credit'
+        write(f"{category[:30]:<30} {'$' + format_cents(abs(amount)):<15} {kind:<8} {_percentage(amount, total):<9.1f}%\n")
+    write("\n")
+
+    write("MONTHLY SUMMARY\n" + rule)
+    for (year, month), month_summary in sorted(summary['months'].items(), reverse=True):
+        month_total = month_summary['debits'] + month_summary['credits']
+        write(f"{datetime(year, month, 1).strftime('%B %Y')} ({month_summary['count']} transactions):\n" + rule)
+        write(f"{'Category':<15} {'Amount':<15} {'Percentage':<15}\n")
+        for label, amount in (('Debits', month_summary['debits']), ('Credits', month_summary['credits']),
+                              ('Net', month_summary['credits'] - month_summary['debits'])):
+            write(f"{label:<15} {'$' + format_cents(amount):<15} {_percentage(amount, month_total):<14.1f}%\n")
+        for category, amount in sorted(month_summary['categories'].items()):
+            write(f"  {category[:28]:<28} {'$' + format_cents(abs(amount)):<15} {_percentage(amount, month_total):<9.1f}%\n")
+        write("\n")
+
+    write("=" * 80 + "\n")
+    write(f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+
+def _write_csv(file, transactions, summary, include_rows):
+    debits = summary['debits']
+    credits = summary['credits']
+    total = debits + credits
+    writer = csv.writer(file)
+    writer.writerow(['Section', 'Period', 'Category', 'Type', 'Debits', 'Credits', 'Net', 'Percentage', 'Count'])
+    writer.writerow(['overall', '', '', '', format_cents(debits), format_cents(credits), format_cents(credits - debits), '', summary['count']])
+
+    for category, amount in sorted(summary['categories'].items()):
+        kind = 'debit' if amount < 0 else 'credit'
+        writer.writerow(['category', '', category, kind, '', '', format_cents(amount), f"{_percentage(amount, total):.1f}", ''])
+
+    for (year, month), month_summary in sorted(summary['months'].items()):
+        period = f"{year}-{month:02d}"
+        month_total = month_summary['debits'] + month_summary['credits']
+        writer.writerow(['month', period, '', '', format_cents(month_summary['debits']), format_cents(month_summary['credits']),
+                         format_cents(month_summary['credits'] - month_summary['debits']),
+                         f"{_percentage(month_summary['debits'] + month_summary['credits'], total):.1f}",
+                         month_summary['count']])
+        for category, amount in sorted(month_summary['categories'].items()):
+            kind = 'debit' if amount < 0 else 'credit'
+            writer.writerow(['month_category', period, category, kind, '', '', format_cents(amount),
+                             f"{_percentage(amount, month_total):.1f}", ''])
+
+    if include_rows:
+        writer.writerows(
+            ['transaction', t['date'].strftime('%Y-%m-%d'), t['description'], t['type'], '', '', format_cents(t['amount']), '', t.get('id', '')]
+            for t in transactions
+        )
+
+
+def summary_json(summary):
+    """Return a summary's figures in the JSON report layout, with amounts in dollars."""
+    debits = summary['debits']
+    credits = summary['credits']
+    total = debits + credits
+    return {
+        'summary': {
+            'count': summary['count'],
+            'debits': debits / 100,
+            'credits': credits / 100,
+            'net': (credits - debits) / 100,
+            'debit_percentage': round(_percentage(debits, total), 1),
+            'credit_percentage': round(_percentage(credits, total), 1)
+        },
+        'categories': {category: amount / 100 for category, amount in sorted(summary['categories'].items())},
+        'months': [
+            {
+                'month': f"{year}-{month:02d}",
+                'count': month_summary['count'],
+                'debits': month_summary['debits'] / 100,
+                'credits': month_summary['credits'] / 100,
+                'net': (month_summary['credits'] - month_summary['debits']) / 100,
+                'categories': {category: amount / 100 for category, amount in sorted(month_summary['categories'].items())}
+            }
+            for (year, month), month_summary in sorted(summary['months'].items())
+        ]
+    }
+
+
+def transaction_json(transaction):
+    """Return one transaction in the JSON report layout, with its amount in dollars."""
+    return {
+        'id': transaction.get('id'),
+        'date': transaction['date'].strftime('%Y-%m-%d'),
+        'amount': transaction['amount'] / 100,
+        'type': transaction['type'],
+        'description': transaction['description']
+    }
+
+
+def _write_json(file, transactions, summary, include_rows):
+    head = {'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **summary_json(summary)}
+    # Write the summary, then stream the rows into the "transactions" array
+    text = json.dumps(head, indent=2)
+    if not include_rows:
+        file.write(text + "\n")
+        return
+    file.write(text[:-2] + ',\n  "transactions": [')
+    separator = "\n    "
+    for t in transactions:
+        file.write(separator + json.dumps(transaction_json(t)))
+        separator = ",\n    "
+    file.write("\n  ]\n}\n")
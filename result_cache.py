@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from numpy_analytics import aggregate
+from transaction_index import _ordinal
+
+# Upper bound on the estimated size of all cached results (FINANCE_CACHE_MB overrides it)
+CACHE_MAX_BYTES = int(os.environ.get('FINANCE_CACHE_MB', '64')) * 1024 * 1024
+
+# Bumped by every function that changes or reloads the ledger
+ledger_version = 0
+
+
+def bump_version():
+    """Mark every cached result as stale. Called whenever the ledger changes."""
+    global ledger_version
+    ledger_version += 1
+    return ledger_version
+
+
+def _sizeof(value):
+    """Estimate the memory held by a cached result.
+
+    Lists are charged for their first item times their length, which is
+    exact enough for lists of transaction rows and avoids walking them.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(key) + _sizeof(item) for key, item in value.items())
+    elif isinstance(value, tuple):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, list) and value:
+        size += len(value) * _sizeof(value[0])
+    return size
+
+
+class ResultCache:
+    """LRU cache of computed results with a cap on their estimated total size.
+
+    Keys include the ledger version, so a result computed before a change is
+    never returned after it; stale entries are simply never hit again and age
+    out of the LRU order. Results larger than the whole cap are not stored.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, sizeof=_sizeof):
+        """Return the cached result for key, calling compute() to fill it on a miss.
+
+        sizeof estimates the memory a new result holds against max_bytes.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        size = sizeof(value)
+        with self.lock:
+            if size <= self.max_bytes and key not in self.entries:
+                self.entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Return hit/miss counts, the hit rate and current memory use."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+cache = ResultCache()
+
+
+def _key(name, transactions, *args):
+    return (name, id(transactions), ledger_version) + args
+
+
+def _rows_sizer(transactions):
+    """Return a sizeof for lists of rows taken from transactions.
+
+    Rows of a plain list are shared with the ledger, so only the list
+    itself is charged; other ledgers (a TransactionStore, a SQLite ledger)
+    build new row dicts, which are charged too.
+    """
+    return sys.getsizeof if isinstance(transactions, list) else _sizeof
+
+
+#Cached queries
+def ledger_summary(transactions, totals=None):
+    """Return the aggregate_transactions summary, from the running totals when given."""
+    compute = totals.summary if totals is not None else lambda: aggregate(transactions)
+    return cache.get_or_compute(_key('summary', transactions), compute)
+
+
+def transactions_between(transactions, start, end, transaction_index=None):
+    """Return transactions dated from start to end inclusive, oldest first.
+
+    start and end may be datetimes or YYYY-MM-DD strings. Uses the
+    transaction_index when given, otherwise one scan of the ledger.
+    """
+    low, high = _ordinal(start), _ordinal(end)
+
+    def compute():
+        if transaction_index is not None:
+            return transaction_index.transactions_between(start, end)
+        matches = [t for t in transactions if low <= t['date'].toordinal() <= high]
+        matches.sort(key=lambda t: (t['date'], t.get('id', 0)))
+        return matches
+    return cache.get_or_compute(_key('between', transactions, low, high), compute, _rows_sizer(transactions))
+
+
+def sorted_by_id(transactions):
+    """Return the transactions sorted by ID, as analyze_finances lists them.
+
+    A ledger that already iterates in ID order (ordered_by_id, e.g. a
+    SQLiteLedger) is returned as-is, so its rows are streamed rather than
+    copied into a sorted, cached list.
+    """
+    if getattr(transactions, 'ordered_by_id', False):
+        return transactions
+    return cache.get_or_compute(_key('sorted', transactions),
+                                lambda: sorted(transactions, key=lambda x: x.get('id', 0)),
+                                _rows_sizer(transactions))
@@ -0,0 +1,128 @@
+from aggregation import aggregate_transactions
+from money import format_cents
+
+
+class RunningTotals:
+    """Totals that are kept up to date as transactions change.
+
+    Holds the same figures as aggregate_transactions (overall debits and
+    credits, per-category and per-month totals) but updates them in O(1) on
+    every add, update and delete, so summaries never rescan the ledger.
+    The totals are integer cents, so removing a row exactly undoes adding it.
+    summary() returns a dict in the aggregate_transactions shape.
+    """
+
+    def __init__(self, transactions=None):
+        self.rebuild(transactions or [])
+
+    def rebuild(self, transactions):
+        """Reset the totals from a full pass over transactions."""
+        self.count = 0
+        self.debits = 0
+        self.credits = 0
+        self.categories = {}
+        self.months = {}
+        # Row counts let empty categories and months be dropped on delete
+        self._overall_counts = {}
+        self._category_counts = {}
+        for t in transactions:
+            self.add(t)
+
+    def _apply(self, transaction, sign):
+        """Add (sign=1) or remove (sign=-1) one transaction from every total."""
+        amount = transaction['amount']
+        category = transaction['description'].lower()
+        date = transaction['date']
+        key = (date.year, date.month)
+
+        month = self.months.get(key)
+        if month is None:
+            month = self.months[key] = {'count': 0, 'debits': 0, 'credits': 0, 'categories': {}}
+            self._category_counts[key] = {}
+        month_counts = self._category_counts[key]
+
+        self.count += sign
+        month['count'] += sign
+        if amount < 0:
+            self.debits -= sign * amount
+            month['debits'] -= sign * amount
+        elif amount > 0:
+            self.credits += sign * amount
+            month['credits'] += sign * amount
+
+        self.categories[category] = self.categories.get(category, 0) + sign * amount
+        month['categories'][category] = month['categories'].get(category, 0) + sign * amount
+        month_counts[category] = month_counts.get(category, 0) + sign
+        self._overall_counts[category] = self._overall_counts.get(category, 0) + sign
+
+        if month_counts[category] == 0:
+            del month_counts[category]
+            del month['categories'][category]
+        if self._overall_counts[category] == 0:
+            del self._overall_counts[category]
+            del self.categories[category]
+        if month['count'] == 0:
+            del self.months[key]
+            del self._category_counts[key]
+
+    def add(self, transaction):
+        self._apply(transaction, 1)
+
+    def remove(self, transaction):
+        self._apply(transaction, -1)
+
+    def update(self, old_transaction, new_transaction):
+        self.remove(old_transaction)
+        self.add(new_transaction)
+
+    def summary(self):
+        """Return the totals in the same shape as aggregate_transactions."""
+        return {
+            'count': self.count,
+            'debits': self.debits,
+            'credits': self.credits,
+            'categories': self.categories,
+            'months': self.months
+        }
+
+
+#Consistency check
+def check_totals(totals, transactions):
+    """Compare running totals against a full recomputation.
+
+    Returns a list of human-readable differences; an empty list means the
+    running totals are consistent with transactions. Amounts are integer
+    cents, so the totals must match exactly.
+    """
+    expected = aggregate_transactions(transactions)
+    actual = totals.summary()
+    problems = []
+
+    def compare(label, got, want):
+        if got != want:
+            problems.append(f"{label}: running {format_cents(got)}, recomputed {format_cents(want)}")
+
+    if actual['count'] != expected['count']:
+        problems.append(f"count: running {actual['count']}, recomputed {expected['count']}")
+    compare('debits', actual['debits'], expected['debits'])
+    compare('credits', actual['credits'], expected['credits'])
+
+    if set(actual['categories']) != set(expected['categories']):
+        problems.append(f"categories differ: {sorted(set(actual['categories']) ^ set(expected['categories']))}")
+    for category, amount in expected['categories'].items():
+        compare(f"category {category}", actual['categories'].get(category, 0), amount)
+
+    if set(actual['months']) != set(expected['months']):
+        problems.append(f"months differ: {sorted(set(actual['months']) ^ set(expected['months']))}")
+    for key, month in expected['months'].items():
+        running = actual['months'].get(key)
+        if running is None:
+            continue
+        label = f"{key[0]}-{key[1]:02d}"
+        if running['count'] != month['count']:
+            problems.append(f"{label} count: running {running['count']}, recomputed {month['count']}")
+        compare(f"{label} debits", running['debits'], month['debits'])
+        compare(f"{label} credits", running['credits'], month['credits'])
+        for category, amount in month['categories'].items():
+            compare(f"{label} category {category}", running['categories'].get(category, 0), amount)
+    return problems
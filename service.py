@@ -0,0 +1,550 @@
+#service.py - local JSON API over several ledgers, served from one asyncio event loop
+#
+#   python main.py serve --data-dir ledgers --port 8765
+#
+#   GET    /ledgers                              names of the ledgers in the data directory
+#   POST   /ledgers/NAME/load                    (re)load NAME from disk
+#   POST   /ledgers/NAME/save                    write NAME's unsaved changes now
+#   GET    /ledgers/NAME/transactions            ?from=&to=&category=&offset=&limit=
+#   POST   /ledgers/NAME/transactions            add {"date", "amount", "type", "description"}
+#   GET    /ledgers/NAME/transactions/ID         one transaction
+#   PUT    /ledgers/NAME/transactions/ID         replace its date, amount, type and description
+#   DELETE /ledgers/NAME/transactions/ID         delete it
+#   GET    /ledgers/NAME/analysis                totals by category and month, ?from=&to=&category=
+#   GET    /ledgers/NAME/report                  the summary report, ?format=txt|csv|json&rows=0
+#   GET    /stats                                request counts, loaded ledgers and cache stats
+#
+# Ledger NAME is kept in DATA_DIR/NAME.csv (with its journal), or NAME.db
+# for SQLite ledgers. Amounts in requests are dollars, as a string or a
+# number; a debit's amount is stored as negative whatever sign is sent.
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import financial_utils
+import result_cache
+from financial_utils import (PAGE_SIZE, find_transaction, import_transactions, parse_date, remove_transaction,
+                             replace_transaction, select_transactions)
+from journal import open_journal
+from logger_config import logger
+from money import to_cents
+from numpy_analytics import aggregate
+from report_writer import report_format, summary_json, transaction_json, write_report
+from running_totals import RunningTotals
+from transaction_index import TransactionIndex
+from transaction_store import TransactionStore
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_DATA_DIR = 'ledgers'
+
+# Unsaved changes are written at most this many seconds after they are made...
+FLUSH_INTERVAL = 1.0
+# ...or as soon as one ledger has this many
+FLUSH_BATCH = 500
+
+# Processes for analyses and reports, threads for disk reads and writes
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+IO_WORKERS = 2
+
+# Largest request body accepted, and the most rows one listing returns
+MAX_BODY = 1024 * 1024
+MAX_PAGE = 1000
+
+LEDGER_NAME = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+STATUS_TEXT = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+REPORT_TYPES = {'txt': 'text/plain', 'csv': 'text/csv', 'json': 'application/json'}
+
+# Loading reports a ledger's largest ID through the shared
+# financial_utils.transaction_counter, so only one ledger is loaded at a time
+_load_lock = threading.Lock()
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a {"error": message} body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+#Ledgers
+class Ledger:
+    """One ledger held in memory by the service.
+
+    The rows, running totals and index are only touched while holding
+    lock, so requests to one ledger run one at a time while requests to
+    other ledgers carry on. Changes are recorded in the journal (a
+    TransactionJournal or SQLiteLedger) and written out later by the
+    service's flush task. IDs are assigned per ledger from next_id, which
+    only ever grows, so an ID is never reused even after a delete.
+    """
+
+    def __init__(self, name, filename):
+        self.name = name
+        self.filename = filename
+        self.lock = asyncio.Lock()
+        self.journal = None
+        self.transactions = []
+        self.totals = RunningTotals()
+        self.transaction_index = TransactionIndex()
+        self.next_id = 1
+        self.unsaved = 0
+        self.loaded = False
+        # Bumped on every change; the rendered analysis is reused until it moves
+        self.version = 0
+        self._analysis = (None, None)
+
+    def load(self):
+        """Read the ledger from disk, writing any unsaved changes first. Runs in a worker thread."""
+        if self.journal is not None:
+            self.flush()
+            self.journal.wait()
+        journal = open_journal(self.filename)
+        with _load_lock:
+            transactions = journal.load()
+            self.next_id = financial_utils.transaction_counter + 1
+        if self.journal is not None and hasattr(self.journal, 'close'):
+            self.journal.close()
+        self.journal = journal
+        self.transactions = transactions
+        self.totals = RunningTotals(transactions)
+        self.transaction_index = TransactionIndex(transactions)
+        self.unsaved = 0
+        self.loaded = True
+        self.version += 1
+        result_cache.bump_version()
+        logger.info(f"Service loaded ledger {self.name} with {len(transactions)} transactions")
+        return len(transactions)
+
+    def flush(self):
+        """Write the unsaved changes and return how many were written. Runs in a worker thread.
+
+        Like save_transactions, this folds a long journal back into the CSV.
+        Compaction keeps every ID, so the index and next_id stay as they are.
+        """
+        if not self.unsaved:
+            return 0
+        written = self.journal.flush()
+        self.unsaved = 0
+        self.journal.compact_if_needed(self.transactions)
+        return written
+
+    def analysis(self):
+        """Return the unfiltered analysis as JSON bytes, rendered once per version."""
+        version, body = self._analysis
+        if version != self.version:
+            summary = result_cache.ledger_summary(self.transactions, self.totals)
+            body = json.dumps({'ledger': self.name, **summary_json(summary)}).encode('utf-8')
+            self._analysis = (self.version, body)
+        return body
+
+    def close(self):
+        """Wait for a background compaction and release the ledger file."""
+        if self.journal is None:
+            return
+        self.journal.wait()
+        if hasattr(self.journal, 'close'):
+            self.journal.close()
+
+
+def parse_fields(body):
+    """Return the date, amount (cents), type and description sent in a request body."""
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    try:
+        date = parse_date(str(body['date']))
+        amount = abs(to_cents(body['amount']))
+        transaction_type = str(body['type']).lower()
+        description = str(body['description'])
+    except KeyError as e:
+        raise HTTPError(400, f"Missing field: {e.args[0]}")
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, f"Invalid transaction: {str(e)}")
+    if transaction_type not in ('credit', 'debit'):
+        raise HTTPError(400, "type must be credit or debit")
+    if not description.strip():
+        raise HTTPError(400, "description must not be empty")
+    return {
+        'date': date,
+        'amount': -amount if transaction_type == 'debit' else amount,
+        'type': transaction_type,
+        'description': description
+    }
+
+
+def _int_param(query, name, default):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a whole number")
+    if value < 0:
+        raise HTTPError(400, f"{name} must not be negative")
+    return value
+
+
+def _copy_summary(summary):
+    """Copy a running-totals summary, which is cheaper than copy.deepcopy for its fixed shape."""
+    return {
+        **summary,
+        'categories': dict(summary['categories']),
+        'months': {key: {**month, 'categories': dict(month['categories'])}
+                   for key, month in summary['months'].items()}
+    }
+
+
+def _render_report(transactions, fmt, summary, include_rows):
+    """Write a report into a string. Runs in a worker process."""
+    output = io.StringIO()
+    write_report(transactions, output, fmt, summary, include_rows)
+    return output.getvalue()
+
+
+#HTTP
+async def read_request(reader):
+    """Read one HTTP/1.1 request and return (method, target, headers, body), or None once the client is done."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Request body is larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length > 0 else b''
+    return method.upper(), target, headers, body
+
+
+def write_response(writer, status, body, content_type='application/json', keep_alive=True):
+    """Write one HTTP/1.1 response. body is bytes, text, or anything JSON-serializable."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        body = json.dumps(body).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+#Service
+class LedgerService:
+    """Serves the ledgers in data_dir as a JSON API.
+
+    Every ledger is loaded on first use and then kept in memory. Writes
+    only update memory and the journal's pending list; a background task
+    writes them to disk every flush_interval seconds, or sooner once a
+    ledger has FLUSH_BATCH unsaved changes, so many requests share one
+    fsync. Reports and filtered analyses are CPU-bound, so they run in
+    worker processes on a column copy of the rows (a TransactionStore
+    pickles as a few flat arrays) and the event loop keeps answering other
+    requests meanwhile.
+    """
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, workers=DEFAULT_WORKERS, flush_interval=FLUSH_INTERVAL,
+                 sqlite=False):
+        self.data_dir = data_dir
+        self.flush_interval = flush_interval
+        self.extension = '.db' if sqlite else '.csv'
+        self.ledgers = {}
+        self.requests = 0
+        self.errors = 0
+        self.workers = ProcessPoolExecutor(max_workers=workers)
+        self.io = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='ledger-io')
+        self._flush_requested = None
+        os.makedirs(data_dir, exist_ok=True)
+        self.routes = [
+            ('GET', r'/stats', self.stats),
+            ('GET', r'/ledgers', self.list_ledgers),
+            ('POST', r'/ledgers/([^/]+)/load', self.load),
+            ('POST', r'/ledgers/([^/]+)/save', self.save),
+            ('GET', r'/ledgers/([^/]+)/transactions', self.list_transactions),
+            ('POST', r'/ledgers/([^/]+)/transactions', self.add),
+            ('GET', r'/ledgers/([^/]+)/transactions/(\d+)', self.get),
+            ('PUT', r'/ledgers/([^/]+)/transactions/(\d+)', self.update),
+            ('DELETE', r'/ledgers/([^/]+)/transactions/(\d+)', self.delete),
+            ('GET', r'/ledgers/([^/]+)/analysis', self.analyze),
+            ('GET', r'/ledgers/([^/]+)/report', self.report)
+        ]
+
+    def _filename(self, name):
+        """Return the file that holds ledger name: an existing .db or .csv, else a new one."""
+        for extension in (self.extension, '.db', '.csv'):
+            filename = os.path.join(self.data_dir, name + extension)
+            if os.path.exists(filename) or os.path.exists(filename + '.journal'):
+                return filename
+        return os.path.join(self.data_dir, name + self.extension)
+
+    def _run(self, executor, func, *args):
+        return asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, name, load=True):
+        """Hold the lock of ledger name, loading the ledger first if needed (and load is true)."""
+        if not LEDGER_NAME.fullmatch(name):
+            raise HTTPError(400, "Ledger names may only use letters, digits, '-' and '_'")
+        ledger = self.ledgers.get(name)
+        if ledger is None:
+            ledger = self.ledgers[name] = Ledger(name, self._filename(name))
+        async with ledger.lock:
+            if load and not ledger.loaded:
+                await self._run(self.io, ledger.load)
+            yield ledger
+
+    def _changed(self, ledger):
+        ledger.version += 1
+        ledger.unsaved += 1
+        if ledger.unsaved >= FLUSH_BATCH:
+            self._flush_requested.set()
+
+    def _position(self, ledger, transaction_id):
+        position = find_transaction(ledger.transactions, int(transaction_id), ledger.transaction_index)
+        if position is None:
+            raise HTTPError(404, f"No transaction with ID {transaction_id} in ledger {ledger.name}")
+        return position
+
+    #Persistence
+    async def flush_all(self):
+        """Write the unsaved changes of every ledger. Returns how many were written."""
+        written = 0
+        for ledger in list(self.ledgers.values()):
+            if not ledger.unsaved:
+                continue
+            async with ledger.lock:
+                try:
+                    written += await self._run(self.io, ledger.flush)
+                except Exception as e:
+                    logger.error(f"Error saving ledger {ledger.name}: {str(e)}", exc_info=True)
+        return written
+
+    async def _flush_loop(self):
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            self._flush_requested.clear()
+            await self.flush_all()
+
+    async def close(self):
+        """Write everything still unsaved and release the ledger files."""
+        await self.flush_all()
+        for ledger in self.ledgers.values():
+            await self._run(self.io, ledger.close)
+        self.workers.shutdown()
+        self.io.shutdown()
+
+    #Handlers
+    async def stats(self, query, body):
+        return 200, {
+            'requests': self.requests,
+            'errors': self.errors,
+            'ledgers': {name: {'count': len(ledger.transactions), 'unsaved': ledger.unsaved}
+                        for name, ledger in sorted(self.ledgers.items())},
+            'cache': result_cache.cache.stats()
+        }
+
+    async def list_ledgers(self, query, body):
+        names = set(self.ledgers)
+        for filename in os.listdir(self.data_dir):
+            # A new CSV ledger exists only as its journal until it is compacted
+            name, extension = os.path.splitext(filename.removesuffix('.journal'))
+            if extension in ('.csv', '.db') and LEDGER_NAME.fullmatch(name):
+                names.add(name)
+        return 200, {'ledgers': sorted(names)}
+
+    async def load(self, query, body, name):
+        async with self._locked(name, load=False) as ledger:
+            count = await self._run(self.io, ledger.load)
+        return 200, {'ledger': name, 'count': count}
+
+    async def save(self, query, body, name):
+        async with self._locked(name) as ledger:
+            written = await self._run(self.io, ledger.flush)
+        return 200, {'ledger': name, 'written': written}
+
+    async def list_transactions(self, query, body, name):
+        offset = _int_param(query, 'offset', 0)
+        limit = min(_int_param(query, 'limit', PAGE_SIZE), MAX_PAGE)
+        async with self._locked(name) as ledger:
+            try:
+                rows = select_transactions(ledger.transactions, query.get('from'), query.get('to'),
+                                           query.get('category'), ledger.transaction_index)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            page = [transaction_json(rows[i]) for i in range(offset, min(offset + limit, len(rows)))]
+            total = len(rows)
+        return 200, {'ledger': name, 'total': total, 'offset': offset, 'transactions': page}
+
+    async def add(self, query, body, name):
+        fields = parse_fields(body)
+        async with self._locked(name) as ledger:
+            transaction = {'id': ledger.next_id, **fields}
+            ledger.next_id += 1
+            import_transactions(ledger.transactions, [transaction], ledger.journal, ledger.totals,
+                                ledger.transaction_index)
+            self._changed(ledger)
+        return 201, {'ledger': name, 'transaction': transaction_json(transaction)}
+
+    async def get(self, query, body, name, transaction_id):
+        async with self._locked(name) as ledger:
+            transaction = ledger.transactions[self._position(ledger, transaction_id)]
+        return 200, {'ledger': name, 'transaction': transaction_json(transaction)}
+
+    async def update(self, query, body, name, transaction_id):
+        fields = parse_fields(body)
+        async with self._locked(name) as ledger:
+            transaction = replace_transaction(ledger.transactions, self._position(ledger, transaction_id), fields,
+                                              ledger.journal, ledger.totals, ledger.transaction_index)
+            self._changed(ledger)
+        return 200, {'ledger': name, 'transaction': transaction_json(transaction)}
+
+    async def delete(self, query, body, name, transaction_id):
+        async with self._locked(name) as ledger:
+            transaction = remove_transaction(ledger.transactions, self._position(ledger, transaction_id),
+                                             ledger.journal, ledger.totals, ledger.transaction_index)
+            self._changed(ledger)
+        return 200, {'ledger': name, 'transaction': transaction_json(transaction)}
+
+    async def analyze(self, query, body, name):
+        start, end, category = query.get('from'), query.get('to'), query.get('category')
+        async with self._locked(name) as ledger:
+            if start is None and end is None and category is None:
+                # The running totals are current, so there is nothing to compute
+                return 200, ledger.analysis()
+            try:
+                rows = TransactionStore(select_transactions(ledger.transactions, start, end, category,
+                                                            ledger.transaction_index))
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        summary = await self._run(self.workers, aggregate, rows)
+        return 200, {'ledger': name, **summary_json(summary)}
+
+    async def report(self, query, body, name):
+        try:
+            fmt = report_format(None, query.get('format', 'json'))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        include_rows = query.get('rows', '1') != '0'
+        async with self._locked(name) as ledger:
+            # Render from a copy so the ledger can change while the report is written
+            rows = TransactionStore(ledger.transactions) if include_rows else []
+            summary = _copy_summary(ledger.totals.summary())
+        text = await self._run(self.workers, _render_report, rows, fmt, summary, include_rows)
+        return 200, text, REPORT_TYPES[fmt]
+
+    #Requests
+    async def dispatch(self, method, target, body):
+        """Route one request and return (status, body, content_type)."""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            if body:
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "Request body is not valid JSON")
+            result = await handler(query, body, *match.groups())
+            return result if len(result) == 3 else result + ('application/json',)
+        if allowed:
+            raise HTTPError(405, f"{method} is not allowed on {path}")
+        raise HTTPError(404, f"No such resource: {path}")
+
+    async def handle_connection(self, reader, writer):
+        """Answer requests on one connection until the client closes it (HTTP keep-alive)."""
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    self.requests += 1
+                    status, payload, content_type = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    self.errors += 1
+                    status, payload, content_type = e.status, {'error': str(e)}, 'application/json'
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error handling request: {str(e)}", exc_info=True)
+                    status, payload, content_type = 500, {'error': str(e)}, 'application/json'
+                write_response(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Serve requests until SIGINT or SIGTERM, then write every unsaved change."""
+        self._flush_requested = asyncio.Event()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(signum, stop.set)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"Serving ledgers from {self.data_dir} on http://{host}:{port}")
+        print(f"Serving ledgers from {self.data_dir} on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            flusher.cancel()
+            await self.close()
+            logger.info("Service stopped")
+            print("Service stopped, all changes saved.")
+
+
+def run(host=DEFAULT_HOST, port=DEFAULT_PORT, data_dir=DEFAULT_DATA_DIR, workers=DEFAULT_WORKERS,
+        flush_interval=FLUSH_INTERVAL, sqlite=False):
+    """Run the service in the foreground until interrupted."""
+    service = LedgerService(data_dir, workers, flush_interval, sqlite)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(service.serve(host, port))
+    return 0
@@ -0,0 +1,276 @@
+import os
+import sqlite3
+import threading
+from itertools import groupby
+
+import financial_utils
+from financial_utils import iter_transactions, parse_date
+from instrumentation import instrumented
+from logger_config import logger
+from transaction_store import TransactionStore
+
+# Amounts are stored as integer cents, like in memory, so SUM() is exact. The category
+# column holds the lowercased description that the analyses group by.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id          INTEGER PRIMARY KEY,
+    date        TEXT    NOT NULL,
+    cents       INTEGER NOT NULL,
+    type        TEXT    NOT NULL,
+    description TEXT    NOT NULL,
+    category    TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date);
+"""
+
+COLUMNS = 'id, date, cents, type, description'
+
+INSERT = "INSERT INTO transactions (id, date, cents, type, description, category) VALUES (?, ?, ?, ?, ?, ?)"
+UPDATE = "UPDATE transactions SET date = ?, cents = ?, type = ?, description = ?, category = ? WHERE id = ?"
+DELETE = "DELETE FROM transactions WHERE id = ?"
+
+
+def _date_text(date):
+    """Accept a datetime or a YYYY-MM-DD string and return the YYYY-MM-DD text stored in the table."""
+    if isinstance(date, str):
+        date = parse_date(date)
+    return date.strftime('%Y-%m-%d')
+
+
+def _params(transaction):
+    """Return the insert parameters for a transaction dict."""
+    return (
+        transaction['id'],
+        transaction['date'].strftime('%Y-%m-%d'),
+        transaction['amount'],
+        transaction['type'],
+        transaction['description'],
+        transaction['description'].lower()
+    )
+
+
+def _row(row):
+    """Convert a (id, date, cents, type, description) row into a transaction dict."""
+    return {
+        'id': row[0],
+        'date': parse_date(row[1]),
+        'amount': row[2],
+        'type': row[3],
+        'description': row[4]
+    }
+
+
+class SQLiteLedger:
+    """Transaction ledger kept in a local SQLite file.
+
+    Implements the same load/record/flush interface as TransactionJournal,
+    so it can be passed as the journal to the financial_utils functions:
+    adds, updates and deletes are queued by the record_* methods and
+    flush() writes them in one transaction with executemany(). IDs are the
+    table's primary key and stay stable, so there is nothing to compact.
+
+    The date and category columns are indexed, so transactions_between()
+    and transactions_for_category() read only the matching rows, and
+    summary() computes the aggregate_transactions figures with GROUP BY in
+    SQLite. Iterating the ledger streams every row from the file, which
+    lets write_report() work on it without loading the rows first.
+    """
+
+    # Iteration already yields rows ORDER BY id, so listings need not sort them
+    ordered_by_id = True
+
+    def __init__(self, filename='financial_transactions.db'):
+        self.filename = filename
+        self.pending = []
+        self.loaded = False
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    #Load
+    @instrumented('sqlite.load', rows='result')
+    def load(self, columnar=False):
+        """Load every row into a list (or TransactionStore) and continue IDs after the largest one."""
+        with self.lock:
+            transactions = list(self)
+            self.pending = []
+            self.loaded = True
+            (max_id,) = self.connection.execute("SELECT MAX(id) FROM transactions").fetchone()
+            financial_utils.transaction_counter = max_id or 0
+            logger.info(f"Loaded {len(transactions)} transactions from {self.filename}")
+            return TransactionStore(transactions) if columnar else transactions
+
+    def __iter__(self):
+        with self.lock:
+            cursor = self.connection.execute(f"SELECT {COLUMNS} FROM transactions ORDER BY id")
+        for row in cursor:
+            yield _row(row)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def __bool__(self):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM transactions LIMIT 1").fetchone() is not None
+
+    #Record changes
+    def record_add(self, transaction):
+        with self.lock:
+            self.pending.append(('add', _params(transaction)))
+
+    def record_update(self, transaction):
+        with self.lock:
+            params = _params(transaction)
+            self.pending.append(('update', params[1:] + params[:1]))
+
+    def record_delete(self, transaction_id):
+        with self.lock:
+            self.pending.append(('delete', (transaction_id,)))
+
+    #Flush
+    @instrumented('sqlite.flush', rows='count')
+    def flush(self):
+        """Write the pending changes in one transaction and return how many were written.
+
+        Consecutive changes of the same kind go to executemany() together,
+        and the order of the changes is preserved.
+        """
+        statements = {'add': INSERT, 'update': UPDATE, 'delete': DELETE}
+        with self.lock:
+            if not self.pending:
+                return 0
+            with self.connection:
+                for op, entries in groupby(self.pending, key=lambda entry: entry[0]):
+                    self.connection.executemany(statements[op], [params for _, params in entries])
+            written = len(self.pending)
+            self.pending = []
+            logger.info(f"Wrote {written} changes to {self.filename}")
+            return written
+
+    def replace_all(self, transactions):
+        """Replace every row with transactions in one transaction and return how many were written."""
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM transactions")
+                cursor = self.connection.executemany(INSERT, (_params(t) for t in transactions))
+            self.pending = []
+            return cursor.rowcount
+
+    def compact(self, transactions, background=False):
+        """Write transactions as the whole ledger. IDs are kept, so no renumbering is needed."""
+        self.loaded = True
+        self.replace_all(transactions)
+
+    def compact_if_needed(self, transactions):
+        """SQLite updates rows in place, so there is never a journal to fold back."""
+        return False
+
+    def wait(self):
+        """Writes are synchronous, so there is nothing to wait for."""
+
+    #Queries
+    def transactions_between(self, start, end):
+        """Return transactions dated from start to end inclusive, oldest first.
+
+        start and end may be datetimes or YYYY-MM-DD strings.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {COLUMNS} FROM transactions WHERE date BETWEEN ? AND ? ORDER BY date, id",
+                (_date_text(start), _date_text(end))
+            ).fetchall()
+        return [_row(row) for row in rows]
+
+    def transactions_for_category(self, category, start=None, end=None):
+        """Return the transactions whose description matches category (case-insensitive).
+
+        start and end optionally restrict them to a date range, as in transactions_between.
+        """
+        query = f"SELECT {COLUMNS} FROM transactions WHERE category = ?"
+        params = [category.lower()]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(_date_text(start))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(_date_text(end))
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY date, id", params).fetchall()
+        return [_row(row) for row in rows]
+
+    def categories(self):
+        """Return the categories in the ledger in sorted order."""
+        with self.lock:
+            rows = self.connection.execute("SELECT DISTINCT category FROM transactions ORDER BY category").fetchall()
+        return [category for (category,) in rows]
+
+    #Aggregation
+    @instrumented('sqlite.summary')
+    def summary(self):
+        """Return the aggregate_transactions figures, computed with GROUP BY in SQLite.
+
+        Like RunningTotals.summary() this can be passed to analyze_finances
+        and write_report in place of a pass over the rows. Changes that have
+        not been flushed yet are not included.
+        """
+        debits = "-SUM(CASE WHEN cents < 0 THEN cents ELSE 0 END)"
+        credits = "SUM(CASE WHEN cents > 0 THEN cents ELSE 0 END)"
+        month = "CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER)"
+        with self.lock:
+            execute = self.connection.execute
+            count, total_debits, total_credits = execute(f"SELECT COUNT(*), {debits}, {credits} FROM transactions").fetchone()
+            categories = dict(execute("SELECT category, SUM(cents) FROM transactions GROUP BY category"))
+            months = {}
+            for year, month_number, month_count, month_debits, month_credits in execute(
+                    f"SELECT {month}, COUNT(*), {debits}, {credits} FROM transactions GROUP BY 1, 2"):
+                months[(year, month_number)] = {
+                    'count': month_count,
+                    'debits': month_debits,
+                    'credits': month_credits,
+                    'categories': {}
+                }
+            for year, month_number, category, cents in execute(
+                    f"SELECT {month}, category, SUM(cents) FROM transactions GROUP BY 1, 2, 3"):
+                months[(year, month_number)]['categories'][category] = cents
+        return {
+            'count': count,
+            'debits': total_debits or 0,
+            'credits': total_credits or 0,
+            'categories': categories,
+            'months': months
+        }
+
+
+#Convert
+def write_transactions_sqlite(transactions, filename):
+    """Replace the rows of a SQLite ledger with transactions and return how many were written."""
+    with SQLiteLedger(filename) as ledger:
+        return ledger.replace_all(transactions)
+
+
+def iter_sqlite_transactions(filename):
+    """Yield every transaction in a SQLite ledger. A missing file raises FileNotFoundError."""
+    if not os.path.exists(filename):
+        raise FileNotFoundError(2, "No such file or directory", filename)
+    with SQLiteLedger(filename) as ledger:
+        yield from ledger
+
+
+def csv_to_sqlite(csv_filename, db_filename):
+    """Copy a CSV ledger into a SQLite ledger, streaming the rows. Returns the row count."""
+    financial_utils.transaction_counter = 0
+    return write_transactions_sqlite(iter_transactions(csv_filename), db_filename)
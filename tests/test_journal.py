@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import financial_utils
+import journal as journal_module
+import logger_config
+from journal import TransactionJournal
+
+LEDGER = """Date,Amount,Type,Description,ID
+2024-01-01,10.00,debit,Food,1
+2024-01-02,20.00,credit,Pay,2
+"""
+
+
+def setUpModule():
+    global log_dir
+    log_dir = tempfile.mkdtemp()
+    logger_config.setup_logger(log_dir=log_dir)
+
+
+def tearDownModule():
+    logger_config.setup_logger(log_dir=log_dir)
+    shutil.rmtree(log_dir, ignore_errors=True)
+
+
+class JournalRecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'ledger.csv')
+        with open(self.filename, 'w', newline='') as file:
+            file.write(LEDGER)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def add(self, journal, transactions, description):
+        transactions = financial_utils.add_transaction(transactions, {
+            'date': '2024-02-01', 'amount': '1.00', 'type': 'debit', 'description': description
+        }, journal)
+        financial_utils.save_transactions(transactions, self.filename, journal)
+        return transactions
+
+    def load(self):
+        journal = TransactionJournal(self.filename)
+        return journal, journal.load()
+
+    def test_save_after_torn_line_survives_reload(self):
+        journal, transactions = self.load()
+        self.add(journal, transactions, 'Before crash')
+        # A crash mid-append leaves half an entry without its newline
+        with open(journal.journal_filename, 'a') as file:
+            file.write('{"op": "add", "id": 9, "da')
+
+        journal, transactions = self.load()
+        self.assertEqual(['Food', 'Pay', 'Before crash'], [t['description'] for t in transactions])
+        self.add(journal, transactions, 'After crash')
+
+        _, transactions = self.load()
+        self.assertEqual(['Food', 'Pay', 'Before crash', 'After crash'],
+                         [t['description'] for t in transactions])
+
+    def test_torn_header_starts_a_fresh_journal(self):
+        journal, _ = self.load()
+        with open(journal.journal_filename, 'w') as file:
+            file.write('{"snaps')
+
+        journal, transactions = self.load()
+        self.assertEqual(2, len(transactions))
+        self.add(journal, transactions, 'New')
+
+        _, transactions = self.load()
+        self.assertEqual(['Food', 'Pay', 'New'], [t['description'] for t in transactions])
+
+    def test_hand_edited_csv_keeps_the_journal(self):
+        journal, transactions = self.load()
+        self.add(journal, transactions, 'Saved')
+        with open(self.filename, 'a', newline='') as file:
+            file.write('2024-03-01,5.00,debit,Typed in,\r\n')
+
+        _, transactions = self.load()
+        self.assertTrue(os.path.exists(journal.journal_filename))
+        self.assertEqual(['Food', 'Pay', 'Typed in', 'Saved'], [t['description'] for t in transactions])
+        self.assertEqual(4, len({t['id'] for t in transactions}))
+
+    def test_journal_left_by_crash_between_renames_is_discarded(self):
+        journal, transactions = self.load()
+        self.add(journal, transactions, 'Saved')
+        # Changed after the last save, so the new CSV is newer than the journal
+        financial_utils.replace_transaction(transactions, 2, dict(transactions[2], description='Renamed'), journal)
+        # The first half of a compaction: the new CSV is in place but the old journal is not replaced yet
+        financial_utils.write_transactions_csv(transactions, self.filename, before_replace=journal._mark_compacted)
+
+        _, transactions = self.load()
+        self.assertFalse(os.path.exists(journal.journal_filename))
+        self.assertEqual(['Food', 'Pay', 'Renamed'], [t['description'] for t in transactions])
+
+
+class BinarySnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'ledger.csv')
+        self.threshold = journal_module.BINARY_SNAPSHOT_MIN_BYTES
+        journal_module.BINARY_SNAPSHOT_MIN_BYTES = 0
+
+    def tearDown(self):
+        journal_module.BINARY_SNAPSHOT_MIN_BYTES = self.threshold
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_row_too_large_for_the_cache_still_loads(self):
+        with open(self.filename, 'w', newline='') as file:
+            file.write(LEDGER + f"2024-01-03,1.00,debit,Huge ID,{2 ** 64}\n")
+
+        transactions = TransactionJournal(self.filename).load()
+        self.assertEqual(3, len(transactions))
+        self.assertEqual(['ledger.csv'], os.listdir(self.directory))
+
+    def test_loads_from_a_fresh_cache(self):
+        with open(self.filename, 'w', newline='') as file:
+            file.write(LEDGER)
+        first = TransactionJournal(self.filename).load()
+        self.assertTrue(os.path.exists(self.filename + '.snap'))
+        self.assertEqual(first, TransactionJournal(self.filename).load())
+
+
+if __name__ == '__main__':
+    unittest.main()
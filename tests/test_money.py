@@ -0,0 +1,27 @@
+import unittest
+
+from money import MAX_CENTS, format_cents, parse_cents, to_cents
+
+
+class ParseCentsTest(unittest.TestCase):
+
+    def test_common_forms(self):
+        self.assertEqual(4567, parse_cents('45.67'))
+        self.assertEqual(-5, parse_cents('-0.05'))
+        self.assertEqual(10000, parse_cents('1e2'))
+        self.assertEqual(101, parse_cents('1.005'))
+
+    def test_limits(self):
+        self.assertEqual(MAX_CENTS, parse_cents(format_cents(MAX_CENTS)))
+        self.assertEqual(-MAX_CENTS, parse_cents(format_cents(-MAX_CENTS)))
+        for text in ('92233720368547758.08', '1e20', '-1e300'):
+            with self.assertRaises(ValueError):
+                parse_cents(text)
+        with self.assertRaises(ValueError):
+            to_cents(10 ** 17)
+        with self.assertRaises(ValueError):
+            to_cents(1e300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from money import MAX_CENTS, format_cents
+from service import HTTPError, parse_fields
+
+
+def body(amount):
+    return {'date': '2024-01-01', 'amount': amount, 'type': 'debit', 'description': 'Rent'}
+
+
+class ParseFieldsTest(unittest.TestCase):
+
+    def test_debit_is_negative_cents(self):
+        self.assertEqual(-123456, parse_fields(body('1234.56'))['amount'])
+        self.assertEqual(-MAX_CENTS, parse_fields(body(format_cents(MAX_CENTS)))['amount'])
+
+    def test_amount_beyond_int64_cents_is_rejected(self):
+        for amount in ('1e20', 10 ** 17, 1e300, '92233720368547758.08'):
+            with self.assertRaises(HTTPError) as caught:
+                parse_fields(body(amount))
+            self.assertEqual(400, caught.exception.status)
+
+
+if __name__ == '__main__':
+    unittest.main()
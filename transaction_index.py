@@ -0,0 +1,133 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+
+def _ordinal(date):
+    """Accept a datetime or a YYYY-MM-DD string and return its day ordinal."""
+    if isinstance(date, str):
+        date = datetime.strptime(date, '%Y-%m-%d')
+    return date.toordinal()
+
+
+def _id_at(transactions, position):
+    """Return the ID of the row at position without building a dict for TransactionStore rows."""
+    ids = getattr(transactions, 'ids', None)
+    return ids[position] if ids is not None else transactions[position].get('id')
+
+
+class TransactionIndex:
+    """Secondary indexes over a ledger, keyed by transaction ID.
+
+    Keeps a bisect-sorted date index, a bisect-sorted amount index and a
+    category -> IDs inverted index (categories are lowercased descriptions).
+    add(), remove() and update() keep all of them current, so range,
+    category and top-K queries never scan the whole ledger.
+
+    It also maps each ID to the row's position in the ledger, so edits and
+    deletes find their row in O(1). A delete shifts every later row up by
+    one. Rather than renumbering them on the spot, the map remembers the
+    first position that moved and catches up on the next lookup past it.
+    """
+
+    def __init__(self, transactions=None):
+        self.rebuild(transactions or [])
+
+    def rebuild(self, transactions):
+        """Reset every index from a full pass over transactions."""
+        self.rows = {}
+        self.by_date = []
+        self.by_amount = []
+        self.by_category = {}
+        self.positions = {}
+        self._stale_from = None
+        for position, t in enumerate(transactions):
+            self.add(t, position)
+
+    def add(self, transaction, position=None):
+        """Index a transaction stored at position in the ledger (usually the end)."""
+        self._index(transaction)
+        if position is not None:
+            self.positions[transaction['id']] = position
+
+    def remove(self, transaction):
+        self._unindex(transaction)
+        position = self.positions.pop(transaction['id'], None)
+        if position is not None and (self._stale_from is None or position < self._stale_from):
+            self._stale_from = position
+
+    def update(self, old_transaction, new_transaction):
+        """Re-index a transaction that was replaced in place, keeping its position."""
+        position = self.positions.pop(old_transaction['id'], None)
+        self._unindex(old_transaction)
+        self.add(new_transaction, position)
+
+    def position(self, transactions, transaction_id):
+        """Return the position of transaction_id in transactions, or None if it is not there."""
+        if transaction_id not in self.rows:
+            return None
+        position = self.positions.get(transaction_id)
+        if position is not None and position < len(transactions) and _id_at(transactions, position) == transaction_id:
+            return position
+        # Rows after a delete have moved up: renumber from the first one that moved
+        self._renumber(transactions, self._stale_from or 0)
+        position = self.positions.get(transaction_id)
+        if position is None or _id_at(transactions, position) != transaction_id:
+            self._renumber(transactions, 0)
+            position = self.positions.get(transaction_id)
+        return position
+
+    def _renumber(self, transactions, start):
+        for position in range(start, len(transactions)):
+            self.positions[_id_at(transactions, position)] = position
+        self._stale_from = None
+
+    def _index(self, transaction):
+        transaction_id = transaction['id']
+        self.rows[transaction_id] = transaction
+        insort(self.by_date, (transaction['date'].toordinal(), transaction_id))
+        insort(self.by_amount, (abs(transaction['amount']), transaction_id))
+        category = transaction['description'].lower()
+        # A dict keeps the IDs in insertion order with O(1) removal
+        self.by_category.setdefault(category, {})[transaction_id] = None
+
+    def _unindex(self, transaction):
+        transaction_id = transaction['id']
+        transaction = self.rows.pop(transaction_id)
+        _discard(self.by_date, (transaction['date'].toordinal(), transaction_id))
+        _discard(self.by_amount, (abs(transaction['amount']), transaction_id))
+        category = transaction['description'].lower()
+        ids = self.by_category[category]
+        del ids[transaction_id]
+        if not ids:
+            del self.by_category[category]
+
+    #Queries
+    def transactions_between(self, start, end):
+        """Return transactions dated from start to end inclusive, oldest first.
+
+        start and end may be datetimes or YYYY-MM-DD strings.
+        """
+        low = bisect_left(self.by_date, (_ordinal(start),))
+        high = bisect_right(self.by_date, (_ordinal(end), float('inf')))
+        return [self.rows[transaction_id] for _, transaction_id in self.by_date[low:high]]
+
+    def transactions_for_category(self, category):
+        """Return every transaction whose description matches category (case-insensitive)."""
+        return [self.rows[transaction_id] for transaction_id in self.by_category.get(category.lower(), ())]
+
+    def top_by_amount(self, k):
+        """Return the k transactions with the largest absolute amount, largest first."""
+        if k <= 0:
+            return []
+        return [self.rows[transaction_id] for _, transaction_id in reversed(self.by_amount[-k:])]
+
+    def categories(self):
+        """Return the indexed categories in sorted order."""
+        return sorted(self.by_category)
+
+
+def _discard(sorted_list, key):
+    """Remove key from a bisect-sorted list."""
+    position = bisect_left(sorted_list, key)
+    if position < len(sorted_list) and sorted_list[position] == key:
+        del sorted_list[position]
@@ -0,0 +1,151 @@
+from array import array
+from datetime import datetime
+
+
+class TransactionStore:
+    """Column-oriented transaction storage.
+
+    Each field lives in its own compact array instead of one dict per row:
+        ids          - int64 transaction IDs
+        dates        - int32 day ordinals (datetime.toordinal)
+        cents        - int64 signed amounts in cents (debits are negative)
+        type_codes   - 1-byte index into the type table
+        categories   - int32 index into the interned description table
+
+    The store behaves like the list of transaction dicts used elsewhere in
+    financial_utils: len(), iteration, indexing, item assignment, append()
+    and pop() all accept and return the same dict shape, so every function
+    that works on a list also works on a store. Dicts are built on demand.
+    """
+
+    def __init__(self, transactions=None):
+        self.ids = array('q')
+        self.dates = array('i')
+        self.cents = array('q')
+        self.type_codes = bytearray()
+        self.categories = array('i')
+        self.type_table = []
+        self.category_table = []
+        self._type_lookup = {}
+        self._category_lookup = {}
+        if transactions:
+            self.extend(transactions)
+
+    def _type_code(self, transaction_type):
+        """Return the 1-byte code for a transaction type, adding it if new."""
+        code = self._type_lookup.get(transaction_type)
+        if code is None:
+            if len(self.type_table) >= 256:
+                raise ValueError("Too many distinct transaction types")
+            code = len(self.type_table)
+            self.type_table.append(transaction_type)
+            self._type_lookup[transaction_type] = code
+        return code
+
+    def _category_code(self, description):
+        """Return the interned code for a description, adding it if new."""
+        code = self._category_lookup.get(description)
+        if code is None:
+            code = len(self.category_table)
+            self.category_table.append(description)
+            self._category_lookup[description] = code
+        return code
+
+    def _encode(self, transaction):
+        """Convert a transaction dict into its column values."""
+        return (
+            transaction.get('id', 0),
+            transaction['date'].toordinal(),
+            transaction['amount'],
+            self._type_code(transaction['type']),
+            self._category_code(transaction['description'])
+        )
+
+    def _decode(self, index):
+        """Build the transaction dict for the row at index."""
+        return {
+            'id': self.ids[index],
+            'date': datetime.fromordinal(self.dates[index]),
+            'amount': self.cents[index],
+            'type': self.type_table[self.type_codes[index]],
+            'description': self.category_table[self.categories[index]]
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+    def __iter__(self):
+        for index in range(len(self.ids)):
+            yield self._decode(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("transaction index out of range")
+        return self._decode(index)
+
+    def __setitem__(self, index, transaction):
+        self.update(index, transaction)
+
+    def __delitem__(self, index):
+        self.delete(index)
+
+    def append(self, transaction):
+        """Add a transaction dict to the end of the store."""
+        row_id, date, cents, type_code, category = self._encode(transaction)
+        self.ids.append(row_id)
+        self.dates.append(date)
+        self.cents.append(cents)
+        self.type_codes.append(type_code)
+        self.categories.append(category)
+
+    def append_row(self, row_id, date_ordinal, cents, transaction_type, description):
+        """Add a row from already-encoded column values without building a dict."""
+        self.ids.append(row_id)
+        self.dates.append(date_ordinal)
+        self.cents.append(cents)
+        self.type_codes.append(self._type_code(transaction_type))
+        self.categories.append(self._category_code(description))
+
+    def extend(self, transactions):
+        """Add several transaction dicts."""
+        for transaction in transactions:
+            self.append(transaction)
+
+    def update(self, index, transaction):
+        """Replace the row at index. The row keeps its ID if the dict has none."""
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("transaction index out of range")
+        row_id, date, cents, type_code, category = self._encode(transaction)
+        self.ids[index] = row_id if 'id' in transaction else self.ids[index]
+        self.dates[index] = date
+        self.cents[index] = cents
+        self.type_codes[index] = type_code
+        self.categories[index] = category
+
+    def delete(self, index):
+        """Remove the row at index and return it as a dict."""
+        transaction = self[index]
+        if index < 0:
+            index += len(self)
+        del self.ids[index]
+        del self.dates[index]
+        del self.cents[index]
+        del self.type_codes[index]
+        del self.categories[index]
+        return transaction
+
+    def pop(self, index=-1):
+        return self.delete(index)
+
+    def to_list(self):
+        """Return all rows as a list of transaction dicts."""
+        return list(self)